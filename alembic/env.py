@@ -7,6 +7,7 @@ from alembic import context
 
 from app.core.config import settings
 from app.models.property import Base
+from app.models import analysis_run, building, crawl_job, crawl_page  # noqa: F401  autogenerate用にテーブル定義を読み込む
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
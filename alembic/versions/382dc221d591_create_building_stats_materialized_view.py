@@ -0,0 +1,44 @@
+"""create building_stats materialized view
+
+Revision ID: 382dc221d591
+Revises: 60e8ccb46a1e
+Create Date: 2026-10-19 11:42:09.518374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '382dc221d591'
+down_revision: Union[str, Sequence[str], None] = '60e8ccb46a1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 建物ごとの部屋数・部屋単価の最小と中央値（crud.building.building_stats_query と同じ集計）
+    op.execute("""
+        CREATE MATERIALIZED VIEW building_stats AS
+        SELECT
+            b.id, b.title, b.address, b.building_type, b.age, b.station_distance, b.ward,
+            count(u.id) AS unit_count,
+            min(u.rent_per_sqm) AS min_rent_per_sqm,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY u.rent_per_sqm) AS median_rent_per_sqm
+        FROM buildings b
+        JOIN units u ON u.building_id = b.id
+        GROUP BY b.id
+    """)
+    # REFRESH ... CONCURRENTLY には一意インデックスが必要
+    op.create_index('uq_building_stats_id', 'building_stats', ['id'], unique=True)
+    # 部屋単価の最小の安い順に読む（区で絞る場合も同じ順で読めるように）
+    op.create_index('ix_building_stats_min_rent_per_sqm', 'building_stats', ['min_rent_per_sqm', 'id'], unique=False)
+    op.create_index('ix_building_stats_ward_min_rent_per_sqm', 'building_stats', ['ward', 'min_rent_per_sqm', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS building_stats")
@@ -0,0 +1,44 @@
+"""unique listing key on properties
+
+Revision ID: 47c83a0c921d
+Revises: 91cf69f9f2b9
+Create Date: 2026-10-18 16:48:09.217730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47c83a0c921d'
+down_revision: Union[str, Sequence[str], None] = '91cf69f9f2b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 既存の重複行（再クロールで増えたもの）は最新のidだけ残して削除
+    op.execute("""
+        DELETE FROM properties p
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY title, address, liv_area, floor, floor_plan
+                ORDER BY id DESC
+            ) AS rn
+            FROM properties
+        ) d
+        WHERE p.id = d.id AND d.rn > 1
+    """)
+    op.drop_index('ix_properties_listing_key', table_name='properties')
+    op.create_index('uq_properties_listing_key', 'properties', ['title', 'address', 'liv_area', 'floor', 'floor_plan'], unique=True, postgresql_nulls_not_distinct=True)
+    op.add_column('crawl_jobs', sa.Column('rows_updated', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('crawl_jobs', 'rows_updated')
+    op.drop_index('uq_properties_listing_key', table_name='properties')
+    op.create_index('ix_properties_listing_key', 'properties', ['title', 'address', 'liv_area', 'floor', 'floor_plan'], unique=False)
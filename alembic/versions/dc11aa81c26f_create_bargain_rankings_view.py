@@ -0,0 +1,46 @@
+"""create bargain_rankings materialized view
+
+Revision ID: dc11aa81c26f
+Revises: 45d8b9fc4b69
+Create Date: 2026-10-18 18:40:17.662081
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc11aa81c26f'
+down_revision: Union[str, Sequence[str], None] = '45d8b9fc4b69'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 最新の分析（analysis_runs の最大id）の IQR 下限を満たす採点済み物件を、乖離額の昇順で順位付けする
+    op.execute("""
+        CREATE MATERIALIZED VIEW bargain_rankings AS
+        SELECT
+            r.id AS snapshot_version,
+            row_number() OVER (ORDER BY p.diff_amount, p.id) AS rank,
+            p.id, p.title, p.address, p.building_type, p.price, p.admin_fee, p.liv_area,
+            p.age, p.station_distance, p.floor, p.floor_plan,
+            p.monthly_fee, p.estimated_price, p.divergence_rate, p.diff_amount, p.created_at,
+            r.divergence_lower_bound
+        FROM properties p
+        CROSS JOIN (SELECT * FROM analysis_runs ORDER BY id DESC LIMIT 1) r
+        WHERE p.diff_amount IS NOT NULL
+          AND p.divergence_rate > r.divergence_lower_bound
+    """)
+    # REFRESH ... CONCURRENTLY には一意インデックスが必要
+    op.create_index('uq_bargain_rankings_id', 'bargain_rankings', ['id'], unique=True)
+    # 順位順に読みながら予算・階数・面積・乖離額をインデックス内で絞る
+    op.create_index('ix_bargain_rankings_rank', 'bargain_rankings', ['rank', 'monthly_fee', 'floor', 'liv_area', 'diff_amount'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS bargain_rankings")
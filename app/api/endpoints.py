@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from app.core.db import get_db
+from app.core.db import SessionLocal, get_db
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.wards import validate_wards
 from app.crud import property as crud_property
-from app.services.scraper_v2 import SuumoScraperV2
-from app.schemas.property import PropertyRead
+from app.crud import crawl_job as crud_crawl_job
+from app.crud import building as crud_building
+from app.services import crawl_jobs, training
+from app.services.model_registry import model_name, registry
+from app.schemas.property import PropertyExportQuery, PropertyFilter, PropertyPage, PropertyQuery, PropertyRead, BargainRead
+from app.schemas.building import BuildingDetail, BuildingStats
+from app.schemas.crawl_job import CrawlJobRead
+from app.schemas.model import ModelVersionRead
+import csv
+import io
 import logging
-from typing import List, Optional
-from time import sleep
+from typing import Annotated, List, Optional
 # analytics_v2.py を analytics.py として保存している想定
 from app.services.analytics_v2 import PriceAnalyzerV2 
 from app.models.property import Property
@@ -15,68 +27,289 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/scrape", response_model=List[PropertyRead])
-def run_scraping(pages: int = 60, db: Session = Depends(get_db)):
-    # 1. スクレイピング実行（SUUMO版）
-    scraper = SuumoScraperV2()
-    all_properties = []
-    
-    for p in range(1, pages + 1):
-        page_data = scraper.fetch_page(page=p)
-        all_properties.extend(page_data)
-        sleep(1.5) # サーバーへの礼儀（マナー）
-    
-    # 2. 一括保存を実行（ここが高速化のポイント）
-    if all_properties:
-        return crud_property.create_properties_bulk(db, all_properties)
-    
-    return []
+@router.post("/scrape", response_model=CrawlJobRead, status_code=202)
+def run_scraping(
+    pages: int = Query(60, ge=1, description="取得するページ数"),
+    incremental: bool = Query(True, description="前回から変化のないページを飛ばし、既知の物件ばかりになったら打ち切る"),
+    wards: List[str] = Query(["shinjuku"], description="対象の区（shinjuku, shibuya など。複数指定可）"),
+    db: Session = Depends(get_db)
+):
+    """
+    クロールジョブを登録し、ジョブIDをすぐに返します。
+    取得と保存はバックグラウンドのワーカーで実行されるため、クライアントが切断しても継続します。
+    区を複数指定した場合は順に取得し、pages は区ごとのページ数です。
+    """
+    try:
+        wards = validate_wards(wards)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    job = crud_crawl_job.create_crawl_job(db, pages=pages, incremental=incremental, wards=wards)
+    crawl_jobs.runner.submit(job.id)
+    return job
+
+@router.get("/scrape/jobs", response_model=List[CrawlJobRead])
+def read_crawl_jobs(limit: int = 20, db: Session = Depends(get_db)):
+    return crud_crawl_job.get_crawl_jobs(db, limit=limit)
+
+@router.get("/scrape/jobs/{job_id}", response_model=CrawlJobRead)
+def read_crawl_job(job_id: int, db: Session = Depends(get_db)):
+    """ジョブの進捗（処理済みページ数・パース件数・保存件数・エラー数）を返します。"""
+    job = crud_crawl_job.get_crawl_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    return job
+
+@router.post("/scrape/jobs/{job_id}/cancel", response_model=CrawlJobRead)
+def cancel_crawl_job(job_id: int, db: Session = Depends(get_db)):
+    job = crud_crawl_job.get_crawl_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    if not crud_crawl_job.request_cancel(db, job):
+        raise HTTPException(status_code=409, detail=f"Crawl job is already {job.status}")
+    crawl_jobs.runner.cancel(job.id)
+    return job
+
+@router.post("/scrape/jobs/{job_id}/resume", response_model=CrawlJobRead, status_code=202)
+def resume_crawl_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    失敗・キャンセルしたジョブを、保存済みの最後のページ（checkpoint_ward / checkpoint_page）の次から再開します。
+    プロセスが落ちて running などのまま残ったジョブも、進捗が CRAWL_JOB_STALE_SECONDS 秒止まっていれば再開できます。
+    件数などの進捗は前回の続きから数えます。
+    """
+    job = crud_crawl_job.get_crawl_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    if not crud_crawl_job.request_resume(db, job, settings.CRAWL_JOB_STALE_SECONDS):
+        raise HTTPException(status_code=409, detail=f"Crawl job is {job.status}")
+    crawl_jobs.runner.submit(job.id)
+    return job
+
+# シリアライズ用（キャッシュにはJSONのバイト列を入れる）
+_property_list_adapter = TypeAdapter(List[PropertyRead])
+_property_page_adapter = TypeAdapter(PropertyPage)
+_bargain_list_adapter = TypeAdapter(List[BargainRead])
+_building_list_adapter = TypeAdapter(List[BuildingStats])
+
+def _dump(adapter: TypeAdapter, rows) -> bytes:
+    """ORMオブジェクト／Row を response_model と同じ形の JSON バイト列にする"""
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def _cached_response(request: Request, key: tuple, build) -> Response:
+    """
+    key（エンドポイント名＋正規化済みのクエリ）でキャッシュを引き、なければ build() で作る。
+    If-None-Match が一致すれば本文なしの304を返す。
+    """
+    entry = response_cache.get(key)
+    status = "HIT"
+    if entry is None:
+        version = response_cache.version
+        entry = response_cache.set(key, build(), version)
+        status = "MISS"
+
+    headers = {"ETag": entry.etag, "X-Cache": status, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == entry.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def _property_page(db: Session, limit: int, cursor: Optional[str], filters: PropertyFilter, sort: str, order: str) -> bytes:
+    items, next_cursor = crud_property.get_properties(
+        db, limit=limit, cursor=cursor, filters=filters, sort=sort, order=order
+    )
+    return _dump(_property_page_adapter, {"items": items, "next_cursor": next_cursor})
+
+@router.get("/properties", response_model=PropertyPage)
+def read_properties(
+    request: Request,
+    params: Annotated[PropertyQuery, Query()],
+    db: Session = Depends(get_db),
+):
+    """
+    条件に合う物件を sort 列（同値は id）の順に返します。続きは next_cursor を cursor に渡して取得します。
+    """
+    if params.cursor:
+        try:
+            crud_property.decode_cursor(params.cursor, params.sort, params.order)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return _cached_response(
+        request,
+        ("properties", params.model_dump_json(exclude_none=True)),
+        lambda: _property_page(db, params.limit, params.cursor, params, params.sort, params.order),
+    )
+
+def _export_rows(fmt: str, filters: PropertyFilter, batch_size: int = 1000):
+    """
+    条件に合う物件を1バッチずつ書き出す。StreamingResponse が送り終えるまで読み続けるので、
+    リクエストのセッション（get_db）ではなく専用のセッションを開く。
+    """
+    columns = list(PropertyRead.model_fields)
+    db = SessionLocal()
+    try:
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(columns)
+            yield buf.getvalue()
+        for batch in crud_property.iter_properties(db, filters, batch_size=batch_size):
+            items = _property_list_adapter.validate_python(batch, from_attributes=True)
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerows([getattr(item, col) for col in columns] for item in items)
+                yield buf.getvalue()
+            else:
+                yield "".join(item.model_dump_json() + "\n" for item in items)
+    finally:
+        db.close()
 
-@router.get("/properties", response_model=list[PropertyRead])
-def read_properties(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud_property.get_properties(db, skip=skip, limit=limit)
+@router.get("/properties/export")
+def export_properties(params: Annotated[PropertyExportQuery, Query()]):
+    """
+    条件に合う物件をストリーミングで書き出します（件数によらずサーバーのメモリ使用量は一定）。
+    並び順は (created_at, id) です。絞り込み条件は /properties と同じです。
+    """
+    media_type = "text/csv" if params.format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(params.format, params),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="properties.{params.format}"'},
+    )
+
+@router.get("/cache/stats")
+def read_cache_stats():
+    """読み取りAPIキャッシュのヒット・ミス数など"""
+    return response_cache.stats()
 
 
 @router.post("/analyze")
-def run_analysis(db: Session = Depends(get_db)):
+def run_analysis(
+    full: bool = Query(False, description="全物件を採点し直す（既定は未採点・更新された・古いモデルで採点された物件だけ）"),
+    db: Session = Depends(get_db),
+):
     """
-    【V2】全データを使って再学習し、DBの理論価格を最新状態に更新します。
+    【V2】有効なモデル（/models）で物件を採点し、DBの理論価格を最新状態に更新します。
+    学習はしません（モデルの更新は /models/train で行います）。
     """
     analyzer = PriceAnalyzerV2(db)
 
-    updated_count = analyzer.analyze_and_update() 
+    updated_count = analyzer.analyze_and_update(full=full) 
     
-    if updated_count == 0:
+    if analyzer.stale_rows is None:
         return {"status": "skipped", "message": "Not enough data to analyze."}
+    if analyzer.stale_rows == 0:
+        return {"status": "up_to_date", "updated_count": 0, "message": "No new or changed properties to score."}
         
     return {
         "status": "success", 
         "updated_count": updated_count,
+        "skipped": analyzer.invalid_counts,
+        "models": analyzer.models,
         "message": f"Successfully updated {updated_count} properties using V2 Logic."
     }
 
-@router.get("/bargains", response_model=List[PropertyRead])
+def _model_name(ward: Optional[str]) -> str:
+    if ward is None:
+        return model_name()
+    try:
+        return model_name(validate_wards([ward])[0])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/models", response_model=List[ModelVersionRead])
+def list_models(ward: Optional[str] = Query(None, description="区専用のモデル（省略時は全区共通モデル）")):
+    """登録済みの家賃モデル（新しい順）。active が /analyze で使われるバージョンです。"""
+    name = _model_name(ward)
+    active = registry.active_version(name)
+    return [{**meta, "active": meta["version"] == active} for meta in registry.versions(name)]
+
+@router.post("/models/train", response_model=ModelVersionRead, status_code=201)
+def train_model(
+    activate: bool = Query(True, description="学習後すぐに有効化する"),
+    ward: Optional[str] = Query(None, description="この区の物件だけで区専用のモデルを学習する"),
+    incremental: bool = Query(False, description="有効なモデルに前回の学習以降の追加・更新分だけを学習させる"),
+    db: Session = Depends(get_db),
+):
+    """
+    家賃モデルを学習して新しいバージョンとして登録します。
+    incremental=true なら全件を読み直さず、有効なモデルの統計量に追加分を足すだけです（クロールごとの更新向け）。
+    定期実行するなら API を経由せず `python -m app.services.training` でも同じことができます。
+    """
+    _model_name(ward)
+    if incremental:
+        meta = training.update_and_register(db, activate=activate, ward=ward)
+        if meta is None:
+            raise HTTPException(status_code=409, detail="No new or changed properties since the active model.")
+    else:
+        meta = training.train_and_register(db, activate=activate, ward=ward)
+    if meta is None:
+        raise HTTPException(status_code=409, detail="Not enough data to train.")
+    return {**meta, "active": activate}
+
+@router.post("/models/{version}/activate", response_model=ModelVersionRead)
+def activate_model(version: str, ward: Optional[str] = Query(None, description="区専用のモデル（省略時は全区共通モデル）")):
+    """指定したバージョンを有効化します（次の /analyze から使われます）。"""
+    name = _model_name(ward)
+    try:
+        registry.activate(name, version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Model version not found")
+    return {**registry.get_active(name).meta, "active": True}
+
+@router.get("/bargains", response_model=List[BargainRead])
 def get_bargain_properties(
+    request: Request,
     budget: int = Query(180000, description="家賃＋管理費の合計上限"),
     min_floor: int = Query(2, description="最低階数（1階除外など）"),
     max_area: int = Query(100, description="面積上限（タイポ対策）"),
-    limit: int = 20,
+    max_diff: int = Query(-30000, description="乖離額（実際-理論、円）の上限。マイナスが大きいほどお宝"),
+    limit: int = Query(20, ge=1, le=200),
     db: Session = Depends(get_db)
 ):
     """
     【V2】統計的に「安すぎる」と判定された物件を、指定条件でフィルタリングして返します。
+    /analyze の最後に作られるランキングのスナップショットを読むだけなので、
+    全件が同じ snapshot_version の結果になります。
     """
     analyzer = PriceAnalyzerV2(db)
-    
-    # 修正ポイント: 
-    # 1. 重複していた呼び出しを1回に統合
-    # 2. analytics_v2.py 内で limit まで処理を完結させる
-    results = analyzer.get_bargains(
-        budget=budget, 
-        min_floor=min_floor, 
-        max_area=max_area,
-        limit=limit
+    return _cached_response(
+        request,
+        ("bargains", budget, min_floor, max_area, max_diff, limit),
+        lambda: _dump(_bargain_list_adapter, analyzer.get_bargains(
+            budget=budget, 
+            min_floor=min_floor, 
+            max_area=max_area,
+            max_diff=max_diff,
+            limit=limit
+        )),
     )
-    
-    # すでに analytics_v2.py 内で list[dict] になっているのでそのまま返す
-    return results
\ No newline at end of file
+
+@router.get("/buildings", response_model=List[BuildingStats])
+def read_buildings(
+    request: Request,
+    ward: Optional[str] = Query(None, description="区（shinjuku など）"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    建物ごとの部屋数と部屋単価（（賃料+管理費）/ 専有面積、円/m2）の最小・中央値を、最小の安い順に返します。
+    EXTRACTION_MODE="grouped" でクロールした建物だけが対象です。
+    集計は building_stats（クロールジョブの終わりに作り直すスナップショット）から読みます。
+    """
+    if ward:
+        try:
+            ward = validate_wards([ward])[0]
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    return _cached_response(
+        request,
+        ("buildings", ward, limit),
+        lambda: _dump(_building_list_adapter, crud_building.get_building_stats(db, ward=ward, limit=limit)),
+    )
+
+@router.get("/buildings/{building_id}", response_model=BuildingDetail)
+def read_building(building_id: int, db: Session = Depends(get_db)):
+    """建物の集計と全部屋（部屋単価の安い順）を返します。"""
+    building = crud_building.get_building(db, building_id)
+    if building is None:
+        raise HTTPException(status_code=404, detail="Building not found")
+    return building
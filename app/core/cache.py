@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from app.core.config import settings
+
+
+@dataclass
+class CacheEntry:
+    body: bytes        # シリアライズ済みのレスポンス（ヒット時は Pydantic を通さない）
+    etag: str
+    version: int       # 作成時のデータ版数
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    読み取りAPI用のプロセス内キャッシュ（LRU＋TTL）。
+    /scrape・/analyze がデータを書き換えたら bump() で版数を上げ、古い版のエントリは使わない。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self):
+        """データが変わったことを知らせる（全エントリが無効になる）"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, key: tuple) -> CacheEntry | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != self._version or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: tuple, body: bytes, version: int) -> CacheEntry:
+        """version は計算を始めた時点の版数（計算中に bump されたら保存しない）"""
+        etag = f'"{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        entry = CacheEntry(body=body, etag=etag, version=version, expires_at=time.monotonic() + self.ttl)
+        with self._lock:
+            if version != self._version:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self._version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAXSIZE, settings.RESPONSE_CACHE_TTL)
@@ -1,10 +1,64 @@
+from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from app.core.wards import WARDS
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Prop-Arbitrage API"
     API_V1_STR: str = "/api/v1"
     DATABASE_URL: str | None = None
 
+    # クローラー設定（SUUMOへの礼儀の予算）
+    # 旧実装の sleep(1.5) と同じ「1.5秒に1リクエスト」を既定値にしています
+    CRAWL_CONCURRENCY: int = 4          # 同時に飛ばすリクエスト数
+    CRAWL_RATE_PER_SEC: float = 1 / 1.5 # ホストごとの平均リクエスト数/秒
+    CRAWL_BURST: int = 1                # トークンバケットの容量
+    CRAWL_MAX_RETRIES: int = 3
+    CRAWL_BACKOFF_BASE: float = 1.0     # リトライ待機の基準秒数（指数的に伸ばす）
+    CRAWL_BACKOFF_MAX: float = 30.0
+    CRAWL_TIMEOUT: float = 15.0
+    CRAWL_JOB_WORKERS: int = 2          # 同時に走らせるクロールジョブ数
+    # 既知の物件しか載っていないページがこの数だけ続いたら打ち切る（0で無効）
+    CRAWL_STOP_AFTER_SEEN_PAGES: int = 3
+    # 取得・パースと DB への書き込みの間に置くキューの長さ（ページ数）。書き込みが遅れると取得もここで待つ
+    CRAWL_QUEUE_PAGES: int = 8
+    # この件数（またはページ数）溜まるごとに1トランザクションで書き込み、チェックポイントを進める
+    CRAWL_BATCH_ROWS: int = 500
+    CRAWL_BATCH_PAGES: int = 20
+    # 実行中・待機中のジョブの heartbeat_at がこの秒数より古ければ、持ち主のプロセスが落ちたとみなす
+    CRAWL_JOB_STALE_SECONDS: float = 120.0
+    # 実行中のジョブが heartbeat_at を進める間隔（ページの取得が止まっていても進める。上の秒数より十分短くする）
+    CRAWL_JOB_HEARTBEAT_SECONDS: float = 30.0
+    # 一覧ページのパース（app.services.listing_parser）。ダウンロードとは別のプロセスで行う
+    PARSE_BACKEND: str = "lxml"         # "bs4" / "lxml" / "selectolax"
+    PARSE_WORKERS: int = 2              # パース用のプロセス数（0 ならイベントループとは別スレッドでパース）
+    # "first_room"（建物ごとに最初の1部屋を properties へ）/ "grouped"（全部屋を buildings・units にも取り込む）
+    EXTRACTION_MODE: str = "first_room"
+    # 取得した一覧ページの生 HTML の保存先（app.services.page_archive。パース規則を変えたときの作り直し用）
+    ARCHIVE_PAGES: bool = True
+    ARCHIVE_DIR: str = str(Path(__file__).resolve().parents[2] / "archive")  # 既定はリポジトリ直下
+    # 取り込み方式: "upsert"（バッチINSERT ... ON CONFLICT）/ "copy"（COPY＋ステージングからマージ）
+    INGEST_MODE: str = "upsert"
+
+    # 読み取りAPIのレスポンスキャッシュ（/scrape・/analyze で無効化される）
+    RESPONSE_CACHE_MAXSIZE: int = 256   # 保持するレスポンス数（LRUで追い出し）
+    RESPONSE_CACHE_TTL: float = 60.0    # 秒
+
+    # 学習済みモデルの置き場所（app.services.model_registry）と、API が採点に使うモデル名
+    MODEL_DIR: str = str(Path(__file__).resolve().parents[2] / "ml_models")  # 既定はリポジトリ直下
+    MODEL_NAME: str = "rent_lr"
+    # メモリに載せておくモデル数。/analyze は毎回全区のモデルを引くので、全区共通＋23区が載る数を既定にする
+    # （これより小さいと、--all-wards で学習した後は毎回ディスクからの読み直しになる）
+    MODEL_CACHE_SIZE: int = len(WARDS) + 1
+    # 追加学習のたびに既存の統計量に掛ける係数（1.0 で減衰なし。0.9 なら10回前の追加分の重みは約35%）
+    MODEL_DECAY: float = 1.0
+    # 追加学習で読む行の上端は「読み始めた時刻 - この秒数」（全件学習は読み始めた時刻まで読む）。
+    # updated_at は書き込み側のトランザクション開始時刻なので、これより長く開いているトランザクションの行は、
+    # 後から commit されても上端より前の日時で現れて追加学習では取りこぼす（次の全件学習で拾う）
+    MODEL_WATERMARK_GRACE_SECONDS: float = 300.0
+
+    # 分析・実験用の Parquet スナップショットの置き場所（app.services.snapshot）
+    SNAPSHOT_DIR: str = str(Path(__file__).resolve().parents[2] / "snapshots")  # 既定はリポジトリ直下
+
     # .env内の変数を「受け皿」として定義
     postgres_user: str
     postgres_password: str
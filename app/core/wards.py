@@ -0,0 +1,48 @@
+import re
+
+# 東京23区：SUUMOのURLに使われる識別子（sc_xxx の xxx） -> 区名
+WARDS = {
+    "chiyoda": "千代田区",
+    "chuo": "中央区",
+    "minato": "港区",
+    "shinjuku": "新宿区",
+    "bunkyo": "文京区",
+    "taito": "台東区",
+    "sumida": "墨田区",
+    "koto": "江東区",
+    "shinagawa": "品川区",
+    "meguro": "目黒区",
+    "ota": "大田区",
+    "setagaya": "世田谷区",
+    "shibuya": "渋谷区",
+    "nakano": "中野区",
+    "suginami": "杉並区",
+    "toshima": "豊島区",
+    "kita": "北区",
+    "arakawa": "荒川区",
+    "itabashi": "板橋区",
+    "nerima": "練馬区",
+    "adachi": "足立区",
+    "katsushika": "葛飾区",
+    "edogawa": "江戸川区",
+}
+
+_WARD_BY_NAME = {name: ward for ward, name in WARDS.items()}
+# 住所の先頭（「東京都」は省略されていてもよい）の区名だけを見る。途中の「北区」などの地名には反応させない
+_ADDRESS_RE = re.compile(r"^\s*(?:東京都)?\s*(" + "|".join(map(re.escape, WARDS.values())) + ")")
+
+
+def ward_from_address(address: str | None) -> str | None:
+    """住所から区の識別子を返す（23区以外・判別できない住所は None）"""
+    if not address:
+        return None
+    match = _ADDRESS_RE.match(address)
+    return _WARD_BY_NAME[match.group(1)] if match else None
+
+
+def validate_wards(wards) -> list[str]:
+    """区の識別子のリストを検証する（重複は除き、順番は保つ）。不明な区があれば ValueError"""
+    unknown = [w for w in wards if w not in WARDS]
+    if unknown:
+        raise ValueError(f"Unknown ward(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(wards))
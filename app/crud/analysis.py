@@ -0,0 +1,24 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.analysis_run import AnalysisRun
+from app.models.property import Property
+
+def record_analysis_run(db: Session, r2: float, train_rows: int, scored_rows: int, model_version: str | None = None) -> AnalysisRun:
+    """分析結果を記録し、乖離率のIQR境界をDB側で計算して保存する"""
+    q1, q3 = db.query(
+        func.percentile_cont(0.25).within_group(Property.divergence_rate),
+        func.percentile_cont(0.75).within_group(Property.divergence_rate),
+    ).one()
+    run = AnalysisRun(
+        r2=r2,
+        train_rows=train_rows,
+        scored_rows=scored_rows,
+        model_version=model_version,
+        divergence_q1=q1,
+        divergence_q3=q3,
+        divergence_lower_bound=None if q1 is None else q1 - 1.5 * (q3 - q1),
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
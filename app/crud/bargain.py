@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models.bargain import bargain_rankings
+
+def refresh_bargain_rankings(db: Session):
+    """
+    お宝ランキングを作り直す。CONCURRENTLY なので、更新中も読み手は直前のスナップショットを読める。
+    """
+    db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {bargain_rankings.name}"))
+    db.commit()
+
+def get_bargains(
+    db: Session,
+    budget: float,
+    min_floor: int,
+    max_area: float,
+    max_diff: float = -30000,
+    limit: int = 20,
+):
+    """スナップショットから条件に合うものを順位順に返す（1回のSELECTなので結果は必ず同じ版）"""
+    t = bargain_rankings.c
+    query = (
+        bargain_rankings.select()
+        .where(
+            t.diff_amount <= max_diff,
+            t.monthly_fee <= budget,
+            t.floor >= min_floor,
+            t.liv_area < max_area,
+        )
+        .order_by(t.rank)
+        .limit(limit)
+    )
+    return db.execute(query).all()
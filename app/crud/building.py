@@ -0,0 +1,129 @@
+from sqlalchemy import String, column, func, literal_column, select, text, tuple_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.building import Building, Unit, building_stats
+from app.schemas.building import BuildingCreate
+from typing import Iterable
+
+# 同じ建物とみなすキー：建物名・住所
+BUILDING_KEY = ("title", "address")
+# 同じ部屋とみなすキー（建物の中で）：面積・階数・間取り
+UNIT_KEY = ("building_id", "liv_area", "floor", "floor_plan")
+
+# 再クロール時に上書きする列
+BUILDING_UPSERT_COLUMNS = ("building_type", "age", "station_distance", "ward")
+UNIT_UPSERT_COLUMNS = ("price", "admin_fee")
+
+
+def _upsert(db: Session, table, key, columns, rows: list[dict]):
+    """自然キーで INSERT ... ON CONFLICT DO UPDATE（内容が同じ行は触らない）。挿入した行数と更新した行数を返す"""
+    if not rows:
+        return 0, 0
+    stmt = pg_insert(table)
+    changed = tuple_(*[table.c[col] for col in columns]).is_distinct_from(
+        tuple_(*[stmt.excluded[col] for col in columns])
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={**{col: stmt.excluded[col] for col in columns}, "updated_at": func.now()},
+        where=changed,
+    ).returning(literal_column("(xmax = 0)").label("inserted"))
+    flags = db.execute(stmt, rows).scalars().all()
+    inserted = sum(1 for f in flags if f)
+    return inserted, len(flags) - inserted
+
+
+def _building_ids(db: Session, keys: list[tuple]) -> dict[tuple, int]:
+    """(建物名, 住所) -> id。キーの一覧を VALUES にして1回の JOIN で引く"""
+    table = Building.__table__
+    wanted = values(column("title", String), column("address", String), name="wanted").data(keys)
+    rows = db.execute(
+        select(table.c.id, table.c.title, table.c.address).join(
+            wanted,
+            (table.c.title == wanted.c.title) & table.c.address.is_not_distinct_from(wanted.c.address),
+        )
+    ).all()
+    return {(title, address): id for id, title, address in rows}
+
+
+def upsert_buildings_bulk(db: Session, buildings_in: Iterable[BuildingCreate], batch_size: int = 1000, commit: bool = True) -> dict:
+    """
+    建物と部屋をまとめて取り込む。建物を自然キーで upsert して id を引き、部屋を (建物id, 面積, 階数, 間取り) で upsert する。
+    建物の欄は部屋の数だけ繰り返さず buildings に1行だけ持つ。commit=False なら確定は呼び出し側。
+    """
+    # 同じ文の中で同じキーが2回出ないよう、後勝ちで畳む（部屋は建物ごとに合わせる）
+    buildings: dict[tuple, dict] = {}
+    units: dict[tuple, dict[tuple, dict]] = {}
+    for b in buildings_in:
+        key = tuple(getattr(b, col) for col in BUILDING_KEY)
+        buildings[key] = b.model_dump(exclude={"units"})
+        rooms = units.setdefault(key, {})
+        for u in b.units:
+            rooms[(u.liv_area, u.floor, u.floor_plan)] = u.model_dump()
+
+    counts = {"buildings_inserted": 0, "buildings_updated": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    keys = list(buildings)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        inserted, updated = _upsert(
+            db, Building.__table__, BUILDING_KEY, BUILDING_UPSERT_COLUMNS, [buildings[k] for k in batch]
+        )
+        counts["buildings_inserted"] += inserted
+        counts["buildings_updated"] += updated
+
+        ids = _building_ids(db, batch)
+        rows = [{**room, "building_id": ids[k]} for k in batch for room in units[k].values()]
+        inserted, updated = _upsert(db, Unit.__table__, UNIT_KEY, UNIT_UPSERT_COLUMNS, rows)
+        counts["inserted"] += inserted
+        counts["updated"] += updated
+        counts["unchanged"] += len(rows) - inserted - updated
+
+    if commit:
+        db.commit()
+    return counts
+
+
+def building_stats_query():
+    """
+    建物ごとの部屋数・部屋単価（円/m2）の最小と中央値（building_stats ビューと同じ集計）。
+    units の (building_id, rent_per_sqm) インデックスを建物ごとに順に読むだけで集計できる。
+    """
+    b, u = Building.__table__, Unit.__table__
+    return (
+        select(
+            b,
+            func.count(u.c.id).label("unit_count"),
+            func.min(u.c.rent_per_sqm).label("min_rent_per_sqm"),
+            func.percentile_cont(0.5).within_group(u.c.rent_per_sqm).label("median_rent_per_sqm"),
+        )
+        .join(u, u.c.building_id == b.c.id)
+        .group_by(b.c.id)
+    )
+
+
+def refresh_building_stats(db: Session):
+    """
+    建物ごとの集計を作り直す。CONCURRENTLY なので、更新中も読み手は直前の集計を読める。
+    """
+    db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {building_stats.name}"))
+    db.commit()
+
+
+def get_building_stats(db: Session, ward: str | None = None, limit: int = 100):
+    """部屋単価の最小が安い順（最後に REFRESH した時点の集計）"""
+    t = building_stats.c
+    query = building_stats.select().order_by(t.min_rent_per_sqm.nulls_last(), t.id).limit(limit)
+    if ward:
+        query = query.where(t.ward == ward)
+    return db.execute(query).mappings().all()
+
+
+def get_building(db: Session, building_id: int):
+    """建物の集計と全部屋（なければ None）。1棟分なので集計はビューを通さずその場で行う"""
+    stats = db.execute(building_stats_query().where(Building.id == building_id)).mappings().first()
+    if stats is None:
+        return None
+    units = db.execute(
+        select(Unit).where(Unit.building_id == building_id).order_by(Unit.rent_per_sqm, Unit.id)
+    ).scalars().all()
+    return {**stats, "units": units}
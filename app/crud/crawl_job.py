@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.models.crawl_job import (
+    CrawlJob, ACTIVE_JOB_STATUSES, JOB_QUEUED, JOB_RUNNING, JOB_CANCELLING, JOB_CANCELLED, JOB_FAILED,
+)
+
+def create_crawl_job(db: Session, pages: int, incremental: bool = True, wards: list[str] | None = None) -> CrawlJob:
+    job = CrawlJob(
+        status=JOB_QUEUED,
+        pages_requested=pages,
+        wards=",".join(wards or ["shinjuku"]),
+        incremental=incremental,
+        pages_done=0,
+        pages_skipped=0,
+        rows_parsed=0,
+        rows_inserted=0,
+        rows_updated=0,
+        error_count=0,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_crawl_job(db: Session, job_id: int):
+    return db.get(CrawlJob, job_id)
+
+def get_crawl_jobs(db: Session, limit: int = 20):
+    return db.query(CrawlJob).order_by(CrawlJob.id.desc()).limit(limit).all()
+
+def request_cancel(db: Session, job: CrawlJob) -> bool:
+    """実行中・待機中のジョブにキャンセル要求を立てる（終了済みなら False）"""
+    if job.status not in (JOB_QUEUED, JOB_RUNNING):
+        return job.status == JOB_CANCELLING
+    job.status = JOB_CANCELLING
+    db.commit()
+    db.refresh(job)
+    return True
+
+def orphaned_jobs_filter(stale_after: float):
+    """
+    実行中・待機中のまま heartbeat_at（まだなければ created_at）が stale_after 秒止まっているジョブ。
+    プロセスが落ちた（OOM・コンテナの再起動など）ジョブは状態が running などのまま残るので、これで見分ける。
+    """
+    last_seen = func.coalesce(CrawlJob.heartbeat_at, CrawlJob.created_at)
+    return CrawlJob.status.in_(ACTIVE_JOB_STATUSES) & (last_seen < func.now() - timedelta(seconds=stale_after))
+
+def fail_orphaned_jobs(db: Session, stale_after: float) -> int:
+    """持ち主のいなくなったジョブを failed にする（起動時に呼ぶ）。チェックポイントはそのまま残るので再開できる"""
+    result = db.execute(
+        update(CrawlJob)
+        .where(orphaned_jobs_filter(stale_after))
+        .values(status=JOB_FAILED, finished_at=func.now(), last_error="interrupted: worker process exited")
+    )
+    db.commit()
+    return result.rowcount
+
+def request_resume(db: Session, job: CrawlJob, stale_after: float) -> bool:
+    """
+    失敗・キャンセルしたジョブ、または持ち主のプロセスが落ちたまま残っているジョブを待機中に戻す
+    （チェックポイントの次のページから再開する）。動いているジョブ・完了したジョブは False。
+    """
+    if job.status not in (JOB_FAILED, JOB_CANCELLED):
+        orphaned = db.query(CrawlJob.id).filter(CrawlJob.id == job.id, orphaned_jobs_filter(stale_after)).first()
+        if orphaned is None:
+            return False
+    job.status = JOB_QUEUED
+    job.finished_at = None
+    job.heartbeat_at = func.now()  # 待機中の間も、ほかのプロセスの起動時に落ちたジョブと間違えられないように
+    db.commit()
+    db.refresh(job)
+    return True
+
+def _owned_by(job_id: int, started_at: datetime):
+    """started_at に開始した実行がまだ持っているジョブ（failed にされた・再開で別の実行に引き継がれたものは外れる）"""
+    return (
+        (CrawlJob.id == job_id)
+        & (CrawlJob.started_at == started_at)
+        & CrawlJob.status.in_((JOB_RUNNING, JOB_CANCELLING))
+    )
+
+def touch_heartbeat(db: Session, job_id: int, started_at: datetime) -> bool:
+    """実行中のジョブの heartbeat_at を進める（もう持ち主でなければ何もせず False）"""
+    result = db.execute(update(CrawlJob).where(_owned_by(job_id, started_at)).values(heartbeat_at=func.now()))
+    db.commit()
+    return result.rowcount == 1
+
+def lock_owned_job(db: Session, job_id: int, started_at: datetime) -> bool:
+    """まだ持ち主ならジョブの行をロックして True（このトランザクションの commit まで、ほかから状態を変えられない）"""
+    return db.execute(select(CrawlJob.id).where(_owned_by(job_id, started_at)).with_for_update()).first() is not None
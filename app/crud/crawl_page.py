@@ -0,0 +1,30 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.crawl_page import CrawlPage
+from app.schemas.crawl_page import PageFingerprint
+
+def get_fingerprints(db: Session, url: str) -> dict[int, PageFingerprint]:
+    """URLに対する全ページの前回の指紋を {ページ番号: 指紋} で返す"""
+    rows = db.query(CrawlPage).filter(CrawlPage.url == url).all()
+    return {
+        row.page: PageFingerprint(
+            content_hash=row.content_hash,
+            etag=row.etag,
+            last_modified=row.last_modified,
+        )
+        for row in rows
+    }
+
+def save_fingerprint(db: Session, url: str, page: int, fingerprint: PageFingerprint, changed: bool = True):
+    """ページの指紋を保存する（commit は呼び出し側）"""
+    row = db.query(CrawlPage).filter(CrawlPage.url == url, CrawlPage.page == page).first()
+    if row is None:
+        row = CrawlPage(url=url, page=page)
+        db.add(row)
+    row.content_hash = fingerprint.content_hash
+    row.etag = fingerprint.etag
+    row.last_modified = fingerprint.last_modified
+    row.checked_at = func.now()
+    if changed:
+        row.fetched_at = func.now()
+    return row
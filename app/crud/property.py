@@ -1,7 +1,22 @@
+import base64
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import case, literal, or_, select, tuple_, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.models.property import Property
-from app.schemas.property import PropertyCreate
-from typing import List
+from sqlalchemy.sql import func
+from app.models.property import Property, properties_staging
+from app.schemas.property import PropertyCreate, PropertyFilter
+from typing import Iterable, Iterator, List
+
+# 同じ物件（部屋）とみなすキー：建物名・住所・面積・階数・間取り
+NATURAL_KEY = ("title", "address", "liv_area", "floor", "floor_plan")
+
+def listing_key(p) -> tuple:
+    return tuple(getattr(p, col) for col in NATURAL_KEY)
 
 def create_property(db: Session, property_in: PropertyCreate):
     # Pydanticモデルを辞書に変換してSQLAlchemyモデルを作成
@@ -11,8 +26,103 @@ def create_property(db: Session, property_in: PropertyCreate):
     db.refresh(db_property)
     return db_property
 
-def get_properties(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Property).offset(skip).limit(limit).all()
+# PropertyFilter の min_*/max_* と列の対応（範囲条件）
+RANGE_FILTERS = {
+    "price": "price",
+    "monthly_fee": "monthly_fee",
+    "liv_area": "liv_area",
+    "age": "age",
+    "station_distance": "station_distance",
+    "floor": "floor",
+    "divergence": "divergence_rate",
+}
+# 複数値のいずれかに一致（IN）
+IN_FILTERS = ("building_type", "floor_plan", "ward")
+
+def encode_cursor(sort: str, order: str, value, id: int) -> str:
+    """次ページの開始位置（最後に返した行の並び替え列の値と id）を不透明なトークンにする"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str = "created_at", order: str = "asc") -> tuple:
+    """encode_cursor の逆。壊れたトークンや、別の並び順で作られたトークンは ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, id = json.loads(raw)
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise ValueError("cursor was issued for a different sort")
+        if sort == "created_at":
+            value = datetime.fromisoformat(value)
+        return value, int(id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+
+def properties_query(entity=Property, filters: PropertyFilter | None = None, sort: str = "created_at", order: str = "asc"):
+    """
+    絞り込み・並び替えの SELECT を組み立てる（get_properties / iter_properties / EXPLAIN チェックで共通）。
+    entity は ORM の Property（オブジェクトで受け取る）か Property.__table__（Row で受け取る）。
+    どの条件も (列, id) か単独列のインデックスで引けるものだけにしている。
+    """
+    table = Property.__table__
+    query = select(entity)
+    if filters is not None:
+        for name, col in RANGE_FILTERS.items():
+            low, high = getattr(filters, f"min_{name}"), getattr(filters, f"max_{name}")
+            if low is not None:
+                query = query.where(table.c[col] >= low)
+            if high is not None:
+                query = query.where(table.c[col] <= high)
+        for col in IN_FILTERS:
+            values = getattr(filters, col)
+            if values:
+                query = query.where(table.c[col].in_(values))
+
+    sort_col = table.c[sort]
+    if sort != "created_at":
+        # NULL を含むとキーセットの比較が成り立たないので、その列で並べるときは値のある行だけ
+        query = query.where(sort_col.is_not(None))
+    if order == "desc":
+        return query.order_by(sort_col.desc(), table.c.id.desc())
+    return query.order_by(sort_col, table.c.id)
+
+def get_properties(
+    db: Session,
+    limit: int = 100,
+    cursor: str | None = None,
+    filters: PropertyFilter | None = None,
+    sort: str = "created_at",
+    order: str = "asc",
+):
+    """
+    (sort列, id) 順のキーセットページング。
+    OFFSET と違い深いページでも (列, id) のインデックスを範囲スキャンするだけで済み、
+    途中で行が追加されても重複・抜けが出ない。戻り値は (items, next_cursor)。
+    """
+    query = properties_query(Property, filters, sort, order)
+    sort_col = getattr(Property, sort)
+    if cursor:
+        key, after = tuple_(sort_col, Property.id), tuple_(*decode_cursor(cursor, sort, order))
+        query = query.where(key < after if order == "desc" else key > after)
+    # 1件多く読んで、次のページがあるかを判定する
+    items = db.execute(query.limit(limit + 1)).scalars().all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(sort, order, getattr(last, sort), last.id)
+
+def iter_properties(db: Session, filters: PropertyFilter | None = None, batch_size: int = 1000) -> Iterator[list]:
+    """
+    条件に合う物件を (created_at, id) 順にバッチで返す（エクスポート用）。
+    サーバーサイドカーソル（stream_results）で読むので、全件をメモリに載せない。
+    """
+    query = properties_query(Property.__table__, filters).execution_options(
+        stream_results=True, yield_per=batch_size
+    )
+    for batch in db.execute(query).partitions():
+        yield batch
 
 def create_properties_bulk(db: Session, properties_in: List[PropertyCreate]):
     # PydanticモデルのリストをSQLAlchemyモデルのリストに一括変換
@@ -24,4 +134,206 @@ def create_properties_bulk(db: Session, properties_in: List[PropertyCreate]):
     # 追加された後のデータをリフレッシュ（IDなどが付与される）
     for p in db_properties:
         db.refresh(p)
-    return db_properties
\ No newline at end of file
+    return db_properties
+
+# 再クロール時に上書きする列（推定値などの分析結果は残す）
+UPSERT_COLUMNS = ("price", "admin_fee", "age", "station_distance", "building_type", "ward")
+
+def upsert_properties_bulk(db: Session, properties_in: Iterable[PropertyCreate], batch_size: int = 1000, commit: bool = True) -> dict:
+    """
+    自然キー（NATURAL_KEY）で重複を除いて一括登録する。
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING をバッチ単位で送るので、
+    1万件でも往復は数回で済み、行ごとの refresh も発生しない。
+    commit=False なら確定は呼び出し側（ほかの書き込みと同じトランザクションにしたいとき）。
+    """
+    # 同じ文の中で同じキーが2回出るとPostgreSQLがエラーにするため、後勝ちで畳む
+    rows = {}
+    for p in properties_in:
+        rows[listing_key(p)] = p.model_dump()
+    rows = list(rows.values())
+
+    table = Property.__table__
+    stmt = pg_insert(table)
+    changed = tuple_(*[table.c[col] for col in UPSERT_COLUMNS]).is_distinct_from(
+        tuple_(*[stmt.excluded[col] for col in UPSERT_COLUMNS])
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(NATURAL_KEY),
+        set_={**{col: stmt.excluded[col] for col in UPSERT_COLUMNS}, "updated_at": func.now()},
+        where=changed,  # 内容が同じ行は触らない（updated_at も進めない）
+    ).returning(literal_column("(xmax = 0)").label("inserted"))
+
+    inserted = updated = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        # executemany + RETURNING は SQLAlchemy が複数行の VALUES 1文にまとめて送る（insertmanyvalues）
+        # xmax = 0 なら新規挿入、そうでなければ既存行の更新
+        flags = db.execute(stmt, batch).scalars().all()
+        batch_inserted = sum(1 for f in flags if f)
+        inserted += batch_inserted
+        updated += len(flags) - batch_inserted
+
+    if commit:
+        db.commit()
+    return {"inserted": inserted, "updated": updated, "unchanged": len(rows) - inserted - updated}
+
+
+# COPYで流し込む列（properties_staging と同じ並び）
+COPY_COLUMNS = (
+    "title", "address", "price", "liv_area", "age", "station_distance",
+    "floor_plan", "admin_fee", "floor", "building_type", "ward",
+)
+
+_COPY_SQL = (
+    f"COPY {properties_staging.name} (batch_id, seq, {', '.join(COPY_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+)
+
+# ステージングから1文でマージする（同じキーは seq の大きい方＝後勝ち）
+_MERGE_SQL = f"""
+WITH src AS (
+    SELECT DISTINCT ON ({', '.join(NATURAL_KEY)}) {', '.join(COPY_COLUMNS)}
+    FROM {properties_staging.name}
+    WHERE batch_id = :batch_id
+    ORDER BY {', '.join(NATURAL_KEY)}, seq DESC
+), merged AS (
+    INSERT INTO properties ({', '.join(COPY_COLUMNS)})
+    SELECT {', '.join(COPY_COLUMNS)} FROM src
+    ON CONFLICT ({', '.join(NATURAL_KEY)}) DO UPDATE
+    SET {', '.join(f"{col} = EXCLUDED.{col}" for col in UPSERT_COLUMNS)}, updated_at = now()
+    WHERE ({', '.join(f"properties.{col}" for col in UPSERT_COLUMNS)})
+        IS DISTINCT FROM ({', '.join(f"EXCLUDED.{col}" for col in UPSERT_COLUMNS)})
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT
+    (SELECT count(*) FROM src) AS total,
+    count(*) FILTER (WHERE inserted) AS inserted,
+    count(*) FILTER (WHERE NOT inserted) AS updated
+FROM merged
+"""
+
+class _LineStream(io.TextIOBase):
+    """行のジェネレーターを copy_expert が読めるファイルに見せる（全件を1つの文字列にしない）"""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buf = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._buf) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buf += line
+        if size is None or size < 0:
+            out, self._buf = self._buf, ""
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+def _copy_lines(batch_id: str, properties_in: Iterable[PropertyCreate]):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for seq, p in enumerate(properties_in):
+        values = [getattr(p, col) for col in COPY_COLUMNS]
+        writer.writerow([batch_id, seq] + ["\\N" if v is None else v for v in values])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+def copy_properties_bulk(db: Session, properties_in: Iterable[PropertyCreate], commit: bool = True) -> dict:
+    """
+    大量取り込み用。psycopg2 の copy_expert で UNLOGGED のステージングテーブルへ流し込み、
+    INSERT ... SELECT ... ON CONFLICT の1文で properties にマージする。
+    結果は upsert_properties_bulk と同じ形式（inserted / updated / unchanged）。commit は upsert_properties_bulk と同じ。
+    """
+    batch_id = str(uuid.uuid4())
+    raw_conn = db.connection().connection  # セッションのトランザクション内のDBAPI接続
+    with raw_conn.cursor() as cur:
+        cur.copy_expert(_COPY_SQL, _LineStream(_copy_lines(batch_id, properties_in)))
+
+    total, inserted, updated = db.execute(text(_MERGE_SQL), {"batch_id": batch_id}).one()
+    db.execute(properties_staging.delete().where(properties_staging.c.batch_id == batch_id))
+    if commit:
+        db.commit()
+    return {"inserted": inserted, "updated": updated, "unchanged": total - inserted - updated}
+
+def _estimate_lines(ids, estimated_price, divergence_rate, monthly_fee, model_versions, read_updated_at):
+    # repr はfloatを誤差なく往復できる最短表記。NaN（採点できなかった行）は空欄＝NULL
+    for pid, est, rate, fee, version, touched in zip(ids, estimated_price, divergence_rate, monthly_fee, model_versions, read_updated_at):
+        values = ["" if v != v else repr(float(v)) for v in (est, rate, fee)]
+        touched = "" if touched is None or touched != touched else touched.isoformat()
+        yield f"{int(pid)},{','.join(values)},{version or ''},{touched}\n"
+
+def update_estimates_bulk(db: Session, ids, estimated_price, divergence_rate, monthly_fee, model_versions=None, read_updated_at=None) -> int:
+    """
+    採点結果をサーバー側の集合演算で書き戻す。
+    (id, 理論価格, 乖離率, 月額, モデル) を一時テーブルへ COPY し、UPDATE ... FROM の1文で反映する。
+    行ごとの UPDATE を送らないので、件数が増えても往復回数は変わらない。
+    scored_at も更新するので、次回の差分採点（stale_properties_filter）の対象から外れる。
+    read_updated_at（採点に使った値を読んだときの updated_at）を渡すと、読んだ後にクロールが書き換えた行は
+    古い値の採点で上書きせず、採点し直しが必要なまま残す。戻り値は書き戻した行数。
+    """
+    if model_versions is None:
+        model_versions = [None] * len(ids)
+    guarded = read_updated_at is not None
+    if not guarded:
+        read_updated_at = [None] * len(ids)
+    raw_conn = db.connection().connection
+    with raw_conn.cursor() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE tmp_property_estimates ("
+            " id integer PRIMARY KEY, estimated_price double precision,"
+            " divergence_rate double precision, monthly_fee double precision, model_version text,"
+            " read_updated_at timestamptz"
+            ") ON COMMIT DROP"
+        )
+        cur.copy_expert(
+            "COPY tmp_property_estimates (id, estimated_price, divergence_rate, monthly_fee, model_version, read_updated_at)"
+            " FROM STDIN WITH (FORMAT csv)",
+            _LineStream(_estimate_lines(ids, estimated_price, divergence_rate, monthly_fee, model_versions, read_updated_at)),
+        )
+        cur.execute(
+            "UPDATE properties p SET"
+            " estimated_price = t.estimated_price,"
+            " divergence_rate = t.divergence_rate,"
+            " monthly_fee = t.monthly_fee,"
+            " diff_amount = t.monthly_fee - t.estimated_price,"
+            " model_version = t.model_version,"
+            " scored_at = now()"
+            " FROM tmp_property_estimates t WHERE p.id = t.id"
+            # 行ロックを待った後は新しい版の行に対して条件を評価し直すので、その間の書き換えもここで弾ける
+            + (" AND p.updated_at IS NOT DISTINCT FROM t.read_updated_at" if guarded else "")
+        )
+        updated = cur.rowcount
+    db.commit()
+    return updated
+
+def stale_properties_filter(expected_versions: dict[str, str], default_version: str):
+    """
+    採点し直す必要のある行の条件。
+    未採点・採点後にデータが更新された・いま有効なモデルと違うモデルで採点された、のいずれか。
+    expected_versions は区 -> その区で使うモデル（"名前/バージョン"）、それ以外の区は default_version。
+    """
+    table = Property.__table__
+    expected = case(
+        *[(table.c.ward == ward, version) for ward, version in expected_versions.items()],
+        else_=default_version,
+    ) if expected_versions else literal(default_version)
+    return or_(
+        table.c.scored_at.is_(None),
+        table.c.updated_at > table.c.scored_at,
+        table.c.model_version.is_distinct_from(expected),
+    )
+
+# 取り込み方式（settings.INGEST_MODE で切り替え）
+INGEST_MODES = {
+    "upsert": upsert_properties_bulk,
+    "copy": copy_properties_bulk,
+}
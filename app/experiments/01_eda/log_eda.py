@@ -14,10 +14,12 @@ from app.services.preprocess import load_and_preprocess_data, get_train_val_test
 
 # 接続情報はここに置く（あるいは環境変数から取る）
 DATABASE_URL = os.getenv("DATABASE_URL")
+# SNAPSHOT_DIR があれば DB ではなく Parquet スナップショットから読む
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
 
 if __name__ == "__main__":
     # 1. 部品を使ってデータを準備（preprocess.pyのおかげで1行！）
-    df = load_and_preprocess_data(DATABASE_URL)
+    df = load_and_preprocess_data(SNAPSHOT_DIR or DATABASE_URL)
     train_df, _, _ = get_train_val_test_split(df)
 
     # 2. 可視化（対数変換前後の比較などをここで行う）
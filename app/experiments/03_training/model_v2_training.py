@@ -5,18 +5,22 @@ from sklearn.metrics import r2_score, mean_absolute_error
 import sys
 import os
 from dotenv import load_dotenv
-import joblib
+from datetime import datetime, timezone
 
 load_dotenv()
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
 from app.services.preprocess import load_and_preprocess_data, get_train_val_test_split
+from app.services.model_registry import registry
+from app.services.training import data_fingerprint
 
 DB_URL = os.getenv("DATABASE_URL")
+# 学習の試行錯誤は本番DBを叩かずスナップショットで（python -m app.services.snapshot で作成）
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
 
 if __name__ == "__main__":
     # 1. クリーンなデータのロードと分割
-    df = load_and_preprocess_data(DB_URL)
+    df = load_and_preprocess_data(SNAPSHOT_DIR or DB_URL)
     train_df, val_df, test_df = get_train_val_test_split(df)
 
         # --- 重複チェック ---
@@ -74,10 +78,15 @@ if __name__ == "__main__":
     print(f"最終誤差 (MAE): {test_mae:.0f} 円")
     print("="*30)
 
-    # モデルをファイルとして保存（永続化）
-    SAVE_DIR = "../../../ml_models"
-    os.makedirs(SAVE_DIR, exist_ok=True)
-    joblib.dump(model, f"{SAVE_DIR}/shinjuku_base_v2.pkl")
+    # モデルをレジストリに登録（API が使うモデル名とは別名なので ACTIVE は切り替えない）
+    version = registry.save("shinjuku_base_v2", model, {
+        "features": features,
+        "target": target,
+        "estimator": type(model).__name__,
+        "metrics": {"r2_test": float(test_r2), "mae_test_yen": float(test_mae), "train_rows": len(train_df)},
+        "data_fingerprint": data_fingerprint(X_train.to_numpy(), y_train.to_numpy()),
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    })
 
     print("\n" + "!"*30)
-    print(f"新宿モデルを '{SAVE_DIR}/shinjuku_base_v2.pkl' に結晶化しました。")
\ No newline at end of file
+    print(f"新宿モデルを '{registry.root}/shinjuku_base_v2/{version}' に結晶化しました。")
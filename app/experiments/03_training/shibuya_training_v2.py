@@ -1,4 +1,4 @@
-import joblib
+from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
@@ -10,6 +10,8 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
 from app.core.db import SessionLocal
+from app.services.model_registry import registry
+from app.services.training import data_fingerprint
 
 # 1. データのロード（渋谷限定）
 db = SessionLocal()
@@ -38,8 +40,13 @@ r2 = r2_score(y_test, y_pred)
 print(f"\n【渋谷専用モデルの精度結果】")
 print(f"R2 Score: {r2:.4f}")
 
-# 5. モデル保存（新宿版と分ける）
-SAVE_DIR = "../../../ml_models"
-os.makedirs(SAVE_DIR, exist_ok=True)
-joblib.dump(model, f"{SAVE_DIR}/shibuya_base_v2.pkl")
-print(f"渋谷モデルを '{SAVE_DIR}/shibuya_base_v2.pkl' として保存しました。")
\ No newline at end of file
+# 5. モデルをレジストリに登録（新宿版と名前を分ける）
+version = registry.save("shibuya_base_v2", model, {
+    "features": features,
+    "target": "log_total_fee",
+    "estimator": type(model).__name__,
+    "metrics": {"r2_test": float(r2), "train_rows": len(X_train)},
+    "data_fingerprint": data_fingerprint(X_train.to_numpy(), y_train.to_numpy()),
+    "trained_at": datetime.now(timezone.utc).isoformat(),
+})
+print(f"渋谷モデルを '{registry.root}/shibuya_base_v2/{version}' として保存しました。")
@@ -10,10 +10,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 from app.services.preprocess import load_and_preprocess_data
 
 DB_URL = os.getenv("DATABASE_URL")
+# スナップショットのディレクトリ（未設定なら DB から読む）
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
 
 if __name__ == "__main__":
     # 1. データのロード（学習用ではなく、全データを対象にする）
-    df = load_and_preprocess_data(DB_URL)
+    df = load_and_preprocess_data(SNAPSHOT_DIR or DB_URL)
     
     # 2. 特徴量とターゲットの設定
     features = ['age', 'log_liv_area', 'station_distance', 'floor']
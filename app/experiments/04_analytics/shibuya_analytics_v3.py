@@ -1,6 +1,5 @@
 import sys
 import os
-import joblib
 import pandas as pd
 import numpy as np
 from sqlalchemy import text
@@ -10,8 +9,15 @@ from sklearn.metrics import r2_score, mean_absolute_error
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
 
 from app.core.db import SessionLocal
+from app.services.model_registry import registry
+from app.services.snapshot import load_snapshot
+
+# 設定されていれば本番DBではなく Parquet スナップショット（python -m app.services.snapshot で作成）から読む
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
 
 def load_shibuya_data():
+    if SNAPSHOT_DIR:
+        return load_snapshot(SNAPSHOT_DIR)
     db = SessionLocal()
     # 渋谷の全件（2774件）を取得
     query = text("SELECT * FROM properties") # 必要に応じてWHERE address LIKE '%渋谷%'
@@ -38,8 +44,11 @@ def preprocess_for_inference(df):
 def main():
     print("--- SHIBUYA MARKET ANALYSIS (V3) START ---")
     
-    # 1. モデルロード
-    model = joblib.load("models/shinjuku_base_v2.pkl")
+    # 1. モデルロード（03_training/model_v2_training.py がレジストリに登録した最新版）
+    versions = registry.versions("shinjuku_base_v2")
+    if not versions:
+        raise SystemExit(f"'{registry.root}/shinjuku_base_v2' にモデルがありません。先に 03_training/model_v2_training.py を実行してください")
+    model = registry.load("shinjuku_base_v2", versions[0]["version"]).model
     
     # モデルが学習時に使った「正しい列の順番」を取得
     # これが sklearn モデルの中に保存されています
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+# 空のレジストリから始める（app を読み込む前に置き場所を差し替える）
+os.environ["MODEL_DIR"] = tempfile.mkdtemp(prefix="bootstrap_models_")
+os.environ["ARCHIVE_PAGES"] = "false"
+os.environ.setdefault("PARSE_WORKERS", "0")
+os.environ.setdefault("CRAWL_RATE_PER_SEC", "100")  # 接続先はモックなので待たない
+
+import httpx
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.main import app
+from app.services import crawler
+from app.services.model_registry import model_name, registry
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "suumo_list_page.html")
+PREFIX = "__bootstrap_check__"
+
+# 初回のクロールの直後に /analyze を呼んだとき、今クロールした物件で最初のモデルを学習して採点できるか。
+# SUUMO には接続せず、fixtures の一覧ページを建物名だけ変えて返す（ページごとに別の物件になる）
+
+def fixture_transport() -> httpx.MockTransport:
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = request.url.params.get("pn", "1")
+        return httpx.Response(200, text=html.replace(
+            'class="cassetteitem_content-title">', f'class="cassetteitem_content-title">{PREFIX}{page}-'
+        ))
+
+    return httpx.MockTransport(handler)
+
+def run_job(client: TestClient, pages: int, ward: str) -> dict:
+    job = client.post(f"{settings.API_V1_STR}/scrape", params={"pages": pages, "wards": [ward], "incremental": False}).json()
+    for _ in range(600):
+        job = client.get(f"{settings.API_V1_STR}/scrape/jobs/{job['id']}").json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.1)
+    raise SystemExit(f"クロールジョブ {job['id']} が終わりません")
+
+def cleanup():
+    db = SessionLocal()
+    db.execute(text("DELETE FROM properties WHERE title LIKE :p"), {"p": f"{PREFIX}%"})
+    db.commit()
+    db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="初回クロール直後の /analyze（空のレジストリからの学習）の確認")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--ward", default="chiyoda")
+    parser.add_argument("--keep", action="store_true", help="取り込んだ確認用の物件を消さずに残す")
+    args = parser.parse_args()
+
+    transport = fixture_transport()
+    crawler.AsyncCrawler._client = lambda self: httpx.AsyncClient(transport=transport)
+
+    try:
+        with TestClient(app) as client:
+            job = run_job(client, args.pages, args.ward)
+            print(f"crawl: {job['status']} inserted={job['rows_inserted']} updated={job['rows_updated']}")
+            result = client.post(f"{settings.API_V1_STR}/analyze").json()
+            print(f"analyze: {result}")
+
+        db = SessionLocal()
+        newest, unscored = db.execute(
+            text("SELECT max(coalesce(updated_at, created_at)), count(*) FILTER (WHERE scored_at IS NULL)"
+                 " FROM properties WHERE title LIKE :p"),
+            {"p": f"{PREFIX}%"},
+        ).one()
+        db.close()
+        active = registry.get_active(model_name())
+
+        failures = []
+        if job["status"] != "succeeded" or not job["rows_inserted"] + job["rows_updated"]:
+            failures.append("クロールで物件を取り込めませんでした")
+        if active is None:
+            failures.append("モデルが登録されていません（学習できる行が読めていない）")
+        elif datetime.fromisoformat(active.meta["data_through"]) < newest:
+            failures.append(f"学習の上端 {active.meta['data_through']} が今回の物件 {newest.isoformat()} より前です")
+        if result.get("status") != "success" or not result.get("updated_count"):
+            failures.append("/analyze で採点されていません")
+        if unscored:
+            failures.append(f"今回の物件のうち {unscored} 件が未採点のままです")
+    finally:
+        if not args.keep:
+            cleanup()
+
+    for failure in failures:
+        print(f"[NG] {failure}")
+    if failures:
+        raise SystemExit(1)
+    print(f"[OK] trained {active.name}/{active.version} on {active.meta['metrics']['train_rows']} rows and scored the new listings")
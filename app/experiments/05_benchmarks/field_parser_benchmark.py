@@ -0,0 +1,150 @@
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from app.services import field_parsers
+from app.services.listing_parser import extract_rows
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "*.html")
+
+# 以前の各スクレイパーにあった実装（行ごとに正規表現を引き直す。比較用にそのまま残す）
+def legacy_clean_numeric(text):
+    if not text or text == "-" or "別" in text: return 0.0
+    match = re.search(r"(\d+\.?\d*)", text.replace(",", ""))
+    return float(match.group(1)) if match else 0.0
+
+def legacy_parse_floor(text):
+    if not text or text.strip() == "" or text == "-":
+        return 1
+    first_part = text.split('-')[0]
+    match = re.search(r"(\d+)", first_part)
+    if match:
+        val = int(match.group(1))
+        if "B" in first_part or "地下" in first_part:
+            return -val
+        return val
+    return 1
+
+def legacy_parse_walk_time(text):
+    match = re.search(r"(\d+)分", text)
+    return int(match.group(1)) if match else 0
+
+def legacy_parse_age(text):
+    if "新築" in text or "0年" in text: return 0
+    match = re.search(r"(\d+)年", text)
+    return int(match.group(1)) if match else 0
+
+LEGACY = {
+    "clean_numeric": legacy_clean_numeric,
+    "parse_floor": legacy_parse_floor,
+    "parse_walk_time": legacy_parse_walk_time,
+    "parse_age": legacy_parse_age,
+}
+
+def generate_corpus(rng: random.Random, n: int) -> dict[str, list[tuple[str, object]]]:
+    """欄ごとに (文字列, 正しい値) を n 件ずつ作る。値を先に決めて SUUMO の書式に直すので、正解が分かっている"""
+    corpus = {name: [] for name in LEGACY}
+    stations = ["JR山手線/新宿駅", "都営大江戸線/都庁前駅", "東京メトロ丸ノ内線/西新宿駅", "京王線/初台駅"]
+    for _ in range(n):
+        rent = round(rng.uniform(3, 80), rng.choice([0, 1, 2]))
+        fee = rng.choice([0, 3000, 5000, 8000, 10000, 12000, 15000])
+        area = round(rng.uniform(10, 150), rng.choice([0, 1, 2]))
+        corpus["clean_numeric"] += [
+            (f"{rent:g}万円", float(f"{rent:g}")),
+            ("-" if fee == 0 else f"{fee:,}円", float(fee)),
+            (f"{area:g}m2", float(f"{area:g}")),
+            (rng.choice(["賃料別途", "別途", ""]), 0.0),
+        ]
+
+        floor = rng.randint(1, 40)
+        top = floor + rng.randint(1, 3)
+        corpus["parse_floor"] += [
+            (f"{floor}階", floor),
+            (f"B{floor}階", -floor),
+            (f"{floor}-{top}階", floor),
+            (f"B{floor}-{top}階", -floor),
+            (rng.choice(["-", "", " "]), 1),
+        ]
+
+        walk = rng.randint(1, 30)
+        corpus["parse_walk_time"] += [
+            (f"{rng.choice(stations)} 歩{walk}分", walk),
+            (rng.choice(["", "バス停"]), 0),
+        ]
+
+        age = rng.randint(1, 60)
+        corpus["parse_age"] += [
+            (f"築{age}年", age),
+            ("新築", 0),
+            ("", 0),
+        ]
+    return corpus
+
+def check_corpus(corpus) -> int:
+    """新しい実装が正解と一致するか。以前の実装とずれる文字列も数えて表示する"""
+    failures = 0
+    for name, cases in corpus.items():
+        parse, legacy = getattr(field_parsers, name), LEGACY[name]
+        wrong = [(text, expected, parse(text)) for text, expected in cases if parse(text) != expected]
+        legacy_wrong = {text for text, expected in cases if legacy(text) != expected}
+        failures += len(wrong)
+        print(f"{name:<16}{len(cases):>8} cases  wrong={len(wrong)}  legacy_wrong={len(legacy_wrong)}", end="")
+        print(f"  e.g. {sorted(legacy_wrong)[:3]}" if legacy_wrong else "")
+        for text, expected, got in wrong[:5]:
+            print(f"    {text!r}: expected {expected!r}, got {got!r}")
+    return failures
+
+def page_fields(patterns: list[str]) -> list[dict]:
+    """実際の一覧ページから取った欄（値の重なり方が本番に近い）"""
+    rows = []
+    for path in sorted(p for pattern in patterns for p in glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            rows += extract_rows(f.read())
+    if not rows:
+        raise SystemExit(f"HTML が見つかりません: {patterns}")
+    return rows
+
+def parse_rows(rows, clean_numeric, parse_floor, parse_walk_time, parse_age) -> float:
+    """1行あたりの変換時間（マイクロ秒）。SuumoScraperV2.parse_page と同じ欄を変換する"""
+    start = time.perf_counter()
+    for row in rows:
+        clean_numeric(row["rent"])
+        clean_numeric(row["admin_fee"])
+        clean_numeric(row["liv_area"])
+        parse_age(row["age"])
+        parse_walk_time(row["walk"])
+        parse_floor(row["floor"])
+    return (time.perf_counter() - start) * 1e6 / len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="欄の変換（app.services.field_parsers）の正しさの確認と速度比較")
+    parser.add_argument("--pages", nargs="+", default=[FIXTURES], help="速度比較に使う HTML（glob 可）。既定は fixtures/*.html")
+    parser.add_argument("--cases", type=int, default=2000, help="正しさの確認で作る値の組の数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=200, help="ページの行を何周変換するか")
+    args = parser.parse_args()
+
+    if check_corpus(generate_corpus(random.Random(args.seed), args.cases)):
+        raise SystemExit("正解と一致しない変換があります")
+
+    rows = page_fields(args.pages) * args.repeat
+    for f in (field_parsers.clean_numeric, field_parsers.parse_floor, field_parsers.parse_walk_time, field_parsers.parse_age):
+        f.cache_clear()
+    legacy = parse_rows(rows, legacy_clean_numeric, legacy_parse_floor, legacy_parse_walk_time, legacy_parse_age)
+    shared = parse_rows(
+        rows, field_parsers.clean_numeric, field_parsers.parse_floor,
+        field_parsers.parse_walk_time, field_parsers.parse_age,
+    )
+    print(f"\n{len(rows)} rows")
+    print(f"{'legacy (re.search)':<24}{legacy:>8.2f} us/row")
+    print(f"{'field_parsers':<24}{shared:>8.2f} us/row  ({legacy / shared:.1f}x)")
+    for name, info in field_parsers.cache_info().items():
+        print(f"  {name:<16} hits={info['hits']} misses={info['misses']}")
@@ -0,0 +1,79 @@
+import argparse
+import random
+import sys
+import os
+import time
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from app.core.db import SessionLocal
+from app.crud import property as crud_property
+from app.schemas.property import PropertyCreate
+
+# ベンチマーク用の行はタイトルの接頭辞で見分けて、最後に必ず消す
+BENCH_PREFIX = "__bench__"
+
+def make_rows(n: int, seed: int = 42) -> list[PropertyCreate]:
+    rng = random.Random(seed)
+    return [
+        PropertyCreate(
+            title=f"{BENCH_PREFIX}{i // 5}",
+            address=f"東京都新宿区ベンチ{i % 97}",
+            building_type=rng.choice(["賃貸マンション", "賃貸アパート"]),
+            price=round(rng.uniform(6, 30), 1),
+            admin_fee=rng.choice([0.0, 0.5, 1.0]),
+            liv_area=round(rng.uniform(15, 80), 2),
+            age=rng.randint(0, 50),
+            station_distance=rng.randint(1, 20),
+            floor=i % 5 + 1,
+            floor_plan=rng.choice(["1K", "1DK", "1LDK", "2LDK"]),
+        )
+        for i in range(n)
+    ]
+
+def cleanup(db):
+    db.execute(text("DELETE FROM properties WHERE title LIKE :p"), {"p": f"{BENCH_PREFIX}%"})
+    db.commit()
+
+def timed(func, db, rows):
+    start = time.perf_counter()
+    result = func(db, rows)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="properties への一括取り込み方式の比較")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--skip-orm", action="store_true", help="行ごとに refresh する旧方式を省く（10万件だと遅い）")
+    args = parser.parse_args()
+
+    methods = [
+        ("upsert (INSERT ... ON CONFLICT)", crud_property.upsert_properties_bulk),
+        ("copy (COPY + merge)", crud_property.copy_properties_bulk),
+    ]
+    if not args.skip_orm:
+        methods.insert(0, ("orm (add_all + refresh)", crud_property.create_properties_bulk))
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        print(f"{'rows':>8} | {'method':<32} | {'insert':>9} | {'re-ingest':>9} | rows/s")
+        print("-" * 80)
+        for n in args.sizes:
+            rows = make_rows(n)
+            for name, func in methods:
+                elapsed, _ = timed(func, db, rows)
+                # 2回目は同じデータの再取り込み（冪等な方式なら全件 unchanged）
+                if func is crud_property.create_properties_bulk:
+                    again = "-"
+                else:
+                    again_elapsed, counts = timed(func, db, rows)
+                    again = f"{again_elapsed:8.2f}s"
+                print(f"{n:>8} | {name:<32} | {elapsed:8.2f}s | {again:>9} | {n / elapsed:,.0f}")
+                db.expunge_all()
+                cleanup(db)
+    finally:
+        cleanup(db)
+        db.close()
@@ -0,0 +1,80 @@
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from app.services.listing_parser import PARSER_BACKENDS
+from app.services.page_archive import PageArchive
+from app.services.scraper_v2 import SuumoScraperV2, parse_listing_page
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "*.html")
+
+def load_pages(patterns: list[str]) -> list[str]:
+    paths = sorted(p for pattern in patterns for p in glob.glob(pattern))
+    if not paths:
+        raise SystemExit(f"HTML が見つかりません: {patterns}")
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+def load_archived_pages(root: str, limit: int) -> list[str]:
+    """クロールで保存したページ（app.services.page_archive）をそのままベンチマークに使う"""
+    archive = PageArchive(root)
+    entries = archive.entries(latest_only=True)[-limit:]
+    if not entries:
+        raise SystemExit(f"保存済みのページがありません: {root}")
+    return [archive.get(e["sha256"]) for e in entries]
+
+def bench_serial(backend: str, pages: list[str]) -> float:
+    scraper = SuumoScraperV2(backend=backend)
+    start = time.perf_counter()
+    for i, html in enumerate(pages):
+        scraper.parse_page(html, i)
+    return len(pages) / (time.perf_counter() - start)
+
+def bench_pool(backend: str, pages: list[str], workers: int) -> float:
+    # プールの起動時間は測らない（クローラーではプロセスを使い回すため）
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(parse_listing_page, pages[:workers], range(workers), [None] * workers, [backend] * workers))
+        start = time.perf_counter()
+        list(pool.map(
+            parse_listing_page, pages, range(len(pages)), [None] * len(pages), [backend] * len(pages),
+            chunksize=max(1, len(pages) // (workers * 4)),
+        ))
+        return len(pages) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="一覧ページのパーサー（bs4 / lxml / selectolax）の速度比較")
+    parser.add_argument("--pages", nargs="+", default=[FIXTURES], help="HTML ファイル（glob 可）。既定は fixtures/*.html")
+    parser.add_argument("--archive", help="fixtures の代わりにページの保存先（ARCHIVE_DIR）から読む")
+    parser.add_argument("--archive-limit", type=int, default=200, help="保存先から読むページ数（新しいものから）")
+    parser.add_argument("--repeat", type=int, default=50, help="ページ集合を何周パースするか")
+    parser.add_argument("--backends", nargs="+", default=list(PARSER_BACKENDS), choices=list(PARSER_BACKENDS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="プロセスプールのワーカー数")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # ページごとの抽出ログを止める
+
+    pages = (load_archived_pages(args.archive, args.archive_limit) if args.archive else load_pages(args.pages)) * args.repeat
+    print(f"{len(pages)} pages, workers={args.workers}")
+
+    # どのパーサーでも同じ物件が取れることを先に確かめる
+    expected = SuumoScraperV2(backend="bs4").parse_page(pages[0])
+    for backend in args.backends:
+        if SuumoScraperV2(backend=backend).parse_page(pages[0]) != expected:
+            raise SystemExit(f"{backend} の結果が bs4 と一致しません")
+
+    print(f"{'backend':<12}{'serial pages/s':>16}{'pool pages/s':>16}")
+    for backend in args.backends:
+        serial = bench_serial(backend, pages)
+        pooled = bench_pool(backend, pages, args.workers)
+        print(f"{backend:<12}{serial:>16.1f}{pooled:>16.1f}")
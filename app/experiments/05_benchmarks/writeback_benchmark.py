@@ -0,0 +1,73 @@
+import argparse
+import sys
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from app.core.db import SessionLocal
+from app.crud import property as crud_property
+from app.models.property import Property
+from ingest_benchmark import BENCH_PREFIX, make_rows, cleanup
+
+def fake_scores(ids, seed: int):
+    rng = np.random.default_rng(seed)
+    estimated = rng.uniform(50_000, 300_000, len(ids))
+    monthly = rng.uniform(50_000, 300_000, len(ids))
+    return estimated, (monthly - estimated) / estimated, monthly
+
+def per_row_select_update(db, ids, estimated, rate, monthly):
+    """旧 PriceAnalyzer.update_estimated_prices と同じ：1行ごとに SELECT して更新"""
+    for pid, est, r, fee in zip(ids, estimated, rate, monthly):
+        prop = db.query(Property).filter(Property.id == int(pid)).first()
+        prop.estimated_price = float(est)
+        prop.divergence_rate = float(r)
+        prop.monthly_fee = float(fee)
+    db.commit()
+
+def bulk_update_mappings(db, ids, estimated, rate, monthly):
+    """PriceAnalyzerV2 の旧実装：bulk_update_mappings（行ごとの UPDATE を executemany）"""
+    db.bulk_update_mappings(Property, [
+        {"id": int(pid), "estimated_price": float(est), "divergence_rate": float(r), "monthly_fee": float(fee)}
+        for pid, est, r, fee in zip(ids, estimated, rate, monthly)
+    ])
+    db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="理論価格の書き戻し方式の比較")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--with-per-row", action="store_true", help="1行ずつ SELECT+UPDATE する旧方式も測る（遅い）")
+    args = parser.parse_args()
+
+    methods = [
+        ("bulk_update_mappings", bulk_update_mappings),
+        ("temp table + UPDATE FROM", crud_property.update_estimates_bulk),
+    ]
+    if args.with_per_row:
+        methods.insert(0, ("per-row SELECT + UPDATE", per_row_select_update))
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        print(f"{'rows':>8} | {'method':<26} | {'elapsed':>9} | rows/s")
+        print("-" * 60)
+        for n in args.sizes:
+            crud_property.copy_properties_bulk(db, make_rows(n))
+            ids = np.array(db.execute(
+                text("SELECT id FROM properties WHERE title LIKE :p ORDER BY id"), {"p": f"{BENCH_PREFIX}%"}
+            ).scalars().all())
+            for seed, (name, func) in enumerate(methods):
+                estimated, rate, monthly = fake_scores(ids, seed)
+                start = time.perf_counter()
+                func(db, ids, estimated, rate, monthly)
+                elapsed = time.perf_counter() - start
+                db.expunge_all()
+                print(f"{n:>8} | {name:<26} | {elapsed:8.2f}s | {n / elapsed:,.0f}")
+            cleanup(db)
+    finally:
+        cleanup(db)
+        db.close()
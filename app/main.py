@@ -1,6 +1,12 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.config import settings
 from app.api import endpoints
+from app.core.db import SessionLocal
+from app.crud import crawl_job as crud_crawl_job
+from app.services import crawl_jobs
+from app.services.crawler import shutdown_parse_pool
+from app.services.model_registry import model_name, registry
 import logging
 import sys
 from logging.handlers import RotatingFileHandler
@@ -31,9 +37,30 @@ logging.getLogger("selenium").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 logger.info("Application starting...")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 有効なモデルは起動時に1度だけ読み込み、以降の /analyze で使い回す
+    # （区専用のモデルは /analyze で必要になった時に読み込む）
+    if registry.get_active(model_name()) is None:
+        logger.info(f"No active model '{model_name()}' in {settings.MODEL_DIR}; the first /analyze will train one.")
+    # 前のプロセスが落ちて running などのまま残ったクロールジョブは failed にして、再開できるようにする
+    # （進捗の止まっていないジョブは、ほかのプロセスが動かしているものとして触らない）
+    db = SessionLocal()
+    try:
+        orphaned = crud_crawl_job.fail_orphaned_jobs(db, settings.CRAWL_JOB_STALE_SECONDS)
+    finally:
+        db.close()
+    if orphaned:
+        logger.warning(f"Marked {orphaned} interrupted crawl jobs as failed; resume them with POST /scrape/jobs/{{id}}/resume.")
+    yield
+    # 終了時は実行中のクロールジョブにキャンセルを伝え、区切りの良いところで止める
+    crawl_jobs.runner.shutdown()
+    shutdown_parse_pool()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # ルーターの登録
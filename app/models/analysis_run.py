@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Float, DateTime, String
+from sqlalchemy.sql import func
+from app.models.property import Base
+
+class AnalysisRun(Base):
+    """/analyze の実行記録。お宝判定に使う乖離率の境界値もここで確定させておく"""
+    __tablename__ = "analysis_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    r2 = Column(Float, nullable=True)                    # 学習データでの決定係数
+    model_version = Column(String, nullable=True)        # 採点に使ったモデル（model_registry のバージョン）
+    train_rows = Column(Integer, nullable=False, default=0)
+    scored_rows = Column(Integer, nullable=False, default=0)
+    # 乖離率の四分位とIQR法の下限（これより極端に安いものはデータ異常とみなす）
+    divergence_q1 = Column(Float, nullable=True)
+    divergence_q3 = Column(Float, nullable=True)
+    divergence_lower_bound = Column(Float, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, MetaData, Table
+
+# マテリアライズドビューは Base.metadata に載せない（create_all / autogenerate でテーブル扱いさせない）
+# 定義は alembic のマイグレーション（REFRESH は analytics_v2 の分析の最後）
+view_metadata = MetaData()
+
+# 最新の分析結果に基づくお宝ランキングのスナップショット
+# snapshot_version は元になった analysis_runs.id
+bargain_rankings = Table(
+    "bargain_rankings",
+    view_metadata,
+    Column("snapshot_version", Integer),
+    Column("rank", BigInteger),               # 乖離額の昇順（1がいちばんお得）
+    Column("id", Integer),                    # properties.id
+    Column("title", String),
+    Column("address", String),
+    Column("building_type", String),
+    Column("price", Float),
+    Column("admin_fee", Float),
+    Column("liv_area", Float),
+    Column("age", Integer),
+    Column("station_distance", Integer),
+    Column("floor", Integer),
+    Column("floor_plan", String),
+    Column("monthly_fee", Float),
+    Column("estimated_price", Float),
+    Column("divergence_rate", Float),
+    Column("diff_amount", Float),
+    Column("created_at", DateTime(timezone=True)),
+    Column("divergence_lower_bound", Float),
+)
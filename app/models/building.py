@@ -0,0 +1,68 @@
+from sqlalchemy import BigInteger, Column, Computed, DateTime, Float, ForeignKey, Index, Integer, String, Table
+from sqlalchemy.sql import func
+from app.models.bargain import view_metadata
+from app.models.property import Base
+
+class Building(Base):
+    """全部屋モードの建物（部屋ごとに繰り返していた建物名・住所・築年数などを1行にまとめる）"""
+    __tablename__ = "buildings"
+    __table_args__ = (
+        # 自然キー（crud.building.BUILDING_KEY と同じ並び）
+        Index("uq_buildings_title_address", "title", "address", unique=True, postgresql_nulls_not_distinct=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False)
+    address = Column(String)
+    building_type = Column(String)
+    age = Column(Integer)
+    station_distance = Column(Integer)
+    ward = Column(String, nullable=True, index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class Unit(Base):
+    """建物の中の1部屋"""
+    __tablename__ = "units"
+    __table_args__ = (
+        # 自然キー（crud.building.UNIT_KEY と同じ並び）
+        Index(
+            "uq_units_listing_key", "building_id", "liv_area", "floor", "floor_plan",
+            unique=True, postgresql_nulls_not_distinct=True,
+        ),
+        # 建物ごとの部屋単価の最小・中央値をインデックスの範囲だけで求める
+        Index("ix_units_building_id_rent_per_sqm", "building_id", "rent_per_sqm"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    building_id = Column(Integer, ForeignKey("buildings.id", ondelete="CASCADE"), nullable=False)
+    price = Column(Float)        # 賃料（万円）
+    admin_fee = Column(Float)    # 管理費（万円）
+    liv_area = Column(Float)     # 専有面積（m2）
+    floor = Column(Integer)
+    floor_plan = Column(String)
+    # （賃料+管理費）の円/m2。面積0・不明は NULL。DB が保存時に計算する
+    rent_per_sqm = Column(
+        Float, Computed("(price + COALESCE(admin_fee, 0)) * 10000 / NULLIF(liv_area, 0)", persisted=True)
+    )
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# GET /buildings 用の建物ごとの集計（マテリアライズドビュー。定義は alembic のマイグレーション）
+# 取り込みのたびに全建物・全部屋を集計し直さないよう、クロールジョブの終わり・アーカイブの読み直しの後に REFRESH する
+building_stats = Table(
+    "building_stats",
+    view_metadata,
+    Column("id", Integer),                    # buildings.id
+    Column("title", String),
+    Column("address", String),
+    Column("building_type", String),
+    Column("age", Integer),
+    Column("station_distance", Integer),
+    Column("ward", String),
+    Column("unit_count", BigInteger),
+    Column("min_rent_per_sqm", Float),
+    Column("median_rent_per_sqm", Float),
+)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy.sql import func
+from app.models.property import Base
+
+# ジョブの状態
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_CANCELLING = "cancelling"   # キャンセル要求済み（ワーカーが次のページで停止する）
+JOB_CANCELLED = "cancelled"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING, JOB_CANCELLING)
+
+class CrawlJob(Base):
+    __tablename__ = "crawl_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default=JOB_QUEUED, index=True)
+    pages_requested = Column(Integer, nullable=False)         # 取得予定ページ数（区ごと）
+    wards = Column(String, nullable=False, default="shinjuku", server_default="shinjuku") # 対象の区（カンマ区切り）
+    incremental = Column(Boolean, nullable=False, default=True) # 差分クロール（変更のないページを飛ばす）
+    pages_done = Column(Integer, nullable=False, default=0)   # 処理済みページ数
+    pages_skipped = Column(Integer, nullable=False, default=0) # 変更なしでパースを省略したページ数
+    rows_parsed = Column(Integer, nullable=False, default=0)  # パースできた物件数
+    rows_inserted = Column(Integer, nullable=False, default=0) # DBに新規保存した物件数
+    rows_updated = Column(Integer, nullable=False, default=0)  # 既存物件の内容を更新した数
+    error_count = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    # ここまでは保存済み（物件・指紋と同じトランザクションで進める）。再開時はこの次のページから
+    checkpoint_ward = Column(String, nullable=True)
+    checkpoint_page = Column(Integer, nullable=False, default=0, server_default="0")
+    # 実行中のワーカーが進捗を書くたびに進める。止まったままなら持ち主のプロセスは落ちている
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.property import Base
+
+class CrawlPage(Base):
+    """一覧ページごとの指紋（差分クロール用）"""
+    __tablename__ = "crawl_pages"
+    __table_args__ = (UniqueConstraint("url", "page", name="uq_crawl_pages_url_page"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, nullable=False)             # 一覧のベースURL（エリアごと）
+    page = Column(Integer, nullable=False)           # ページ番号（pn）
+    content_hash = Column(String(64), nullable=True) # 物件一覧部分のSHA-256
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now()) # 内容が変わった最後の取得
+    checked_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) # 最後に確認した日時
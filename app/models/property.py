@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Index, Table, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -6,6 +6,25 @@ Base = declarative_base()
 
 class Property(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        # 自然キー（crud.property.NATURAL_KEY と同じ並び）。再クロールしても行が増えないよう一意にする
+        Index(
+            "uq_properties_listing_key", "title", "address", "liv_area", "floor", "floor_plan",
+            unique=True, postgresql_nulls_not_distinct=True,
+        ),
+        # GET /properties のキーセットページング・エクスポート用（created_at, id の順に読む）
+        Index("ix_properties_created_at_id", "created_at", "id"),
+        # GET /properties の絞り込み・並び替え用（範囲条件とキーセットを同じインデックスで引く）
+        Index("ix_properties_price_id", "price", "id"),
+        Index("ix_properties_monthly_fee_id", "monthly_fee", "id"),
+        Index("ix_properties_liv_area_id", "liv_area", "id"),
+        Index("ix_properties_age_id", "age", "id"),
+        Index("ix_properties_station_distance_id", "station_distance", "id"),
+        Index("ix_properties_floor_id", "floor", "id"),
+        Index("ix_properties_divergence_rate_id", "divergence_rate", "id"),
+        Index("ix_properties_building_type", "building_type"),
+        Index("ix_properties_floor_plan", "floor_plan"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)        # 物件名
@@ -18,12 +37,38 @@ class Property(Base):
     admin_fee = Column(Float)                     #管理費
     floor = Column(Integer)                       #階数
     building_type = Column(String)                #マンション・アパート・戸建てなど
+    ward = Column(String, nullable=True, index=True) # 区（app.core.wards の識別子。shinjuku など）
     # 統計・AI用（理論価格と乖離率）
     estimated_price = Column(Float, nullable=True) # 重回帰で算出した理論価格
     divergence_rate = Column(Float, nullable=True) # 乖離率（（理論-実際）/理論）
     monthly_fee = Column(Float,nullable=True)      #家賃+管理費
     estimated_price = Column(Float,nullable=True)  # AIの予測値（保存済み）
     divergence_rate = Column(Float,nullable=True)  # 乖離率（保存済み）
+    diff_amount = Column(Float, nullable=True)     # 実際-理論（円）。マイナスが大きいほどお宝
+    scored_at = Column(DateTime(timezone=True), nullable=True) # 最後に採点した日時（これより後に updated_at が進んだら再採点）
+    model_version = Column(String, nullable=True)  # 採点したモデル（"名前/バージョン"）
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# COPY取り込み用のステージングテーブル（UNLOGGED：WALを書かないので速い）
+# batch_id ごとに流し込み、properties へマージしたら消す
+properties_staging = Table(
+    "properties_staging",
+    Base.metadata,
+    Column("batch_id", Uuid, nullable=False, index=True),
+    Column("seq", BigInteger, nullable=False),   # 同じキーが複数あった場合に後勝ちにするための通し番号
+    Column("title", String, nullable=False),
+    Column("address", String),
+    Column("price", Float),
+    Column("liv_area", Float),
+    Column("age", Integer),
+    Column("station_distance", Integer),
+    Column("floor_plan", String),
+    Column("admin_fee", Float),
+    Column("floor", Integer),
+    Column("building_type", String),
+    Column("ward", String),
+    prefixes=["UNLOGGED"],
+)
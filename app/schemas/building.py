@@ -0,0 +1,58 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+from app.core.wards import ward_from_address
+
+# 部屋ごとに違う欄（建物の欄は BuildingCreate に1回だけ持つ）
+class UnitBase(BaseModel):
+    price: float = Field(..., description="賃料（万円）")
+    admin_fee: float = Field(default=0.0, description="管理費（万円）")
+    liv_area: float = Field(..., description="専有面積（m2）")
+    floor: int = Field(default=1, description="所在階")
+    floor_plan: str
+
+class UnitCreate(UnitBase):
+    pass
+
+class UnitRead(UnitBase):
+    id: int
+    building_id: int
+    rent_per_sqm: Optional[float] = Field(None, description="（賃料+管理費）/ 専有面積（円/m2）")
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# 全部屋モード（EXTRACTION_MODE="grouped"）で1つの建物として取り込む単位
+class BuildingBase(BaseModel):
+    title: str
+    address: str
+    building_type: str = Field(..., description="建物種別（マンション、アパート等）")
+    age: int = Field(..., description="築年数（年）")
+    station_distance: int = Field(..., description="駅徒歩（分）")
+    ward: Optional[str] = Field(None, description="区（shinjuku など）")
+
+    @model_validator(mode="after")
+    def _fill_ward(self):
+        # 区の指定がなければ住所から判定する（23区以外は None のまま）
+        if self.ward is None:
+            self.ward = ward_from_address(self.address)
+        return self
+
+class BuildingCreate(BuildingBase):
+    units: List[UnitCreate] = Field(default_factory=list)
+    # 一覧の最初の部屋を読めたか（False なら units[0] は2番目以降の部屋）。properties 用の行を作るときだけ使い、DB には書かない
+    first_room_parsed: bool = Field(default=True, exclude=True)
+
+# GET /buildings：建物ごとの集計（部屋単価は units のインデックスから求める）
+class BuildingStats(BuildingBase):
+    id: int
+    unit_count: int
+    min_rent_per_sqm: Optional[float] = Field(None, description="部屋単価の最小（円/m2）")
+    median_rent_per_sqm: Optional[float] = Field(None, description="部屋単価の中央値（円/m2）")
+
+    class Config:
+        from_attributes = True
+
+class BuildingDetail(BuildingStats):
+    units: List[UnitRead]
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from datetime import datetime
+
+# クロールジョブの進捗を返すスキーマ
+class CrawlJobRead(BaseModel):
+    id: int
+    status: str = Field(..., description="queued / running / cancelling / cancelled / succeeded / failed")
+    pages_requested: int = Field(..., description="区ごとの取得予定ページ数")
+    wards: List[str] = Field(..., description="対象の区")
+    incremental: bool = True
+    pages_done: int = Field(0, description="処理済みページ数")
+    pages_skipped: int = Field(0, description="変更なしでパースを省略したページ数")
+    rows_parsed: int = Field(0, description="パースできた物件数")
+    rows_inserted: int = Field(0, description="DBに新規保存した物件数")
+    rows_updated: int = Field(0, description="既存物件の内容を更新した数")
+    error_count: int = Field(0, description="失敗したページ・処理の数")
+    last_error: Optional[str] = None
+    checkpoint_ward: Optional[str] = Field(None, description="保存済みの最後の区（再開時はここから）")
+    checkpoint_page: int = Field(0, description="checkpoint_ward の保存済みの最後のページ")
+    heartbeat_at: Optional[datetime] = Field(None, description="実行中のワーカーが最後に進捗を書いた日時")
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator("wards", mode="before")
+    @classmethod
+    def _split_wards(cls, v):
+        # DBにはカンマ区切りで保存している
+        return v.split(",") if isinstance(v, str) else v
+
+    class Config:
+        from_attributes = True
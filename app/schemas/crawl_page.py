@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+# crawl_pages の1行（ページ番号ごと）をクローラーと CRUD の間で受け渡す形
+@dataclass
+class PageFingerprint:
+    """前回取得時のページの指紋（条件付きリクエストと変更検知に使う）"""
+    content_hash: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# モデルレジストリに登録されたバージョン（meta.json の中身）
+class ModelVersionRead(BaseModel):
+    name: str
+    version: str
+    features: List[str] = Field(..., description="特徴量の並び（この順で行列を組む）")
+    target: str
+    estimator: str
+    ward: Optional[str] = Field(None, description="区専用のモデルならその区（全区共通は null）")
+    metrics: dict = Field(..., description="r2_train / r2_holdout / mae_holdout_yen / train_rows")
+    data_fingerprint: str = Field(..., description="学習データのSHA-256")
+    data_through: Optional[str] = Field(None, description="この日時までに作成・更新された物件を学習済み（追加学習はこれより後の分だけ読む）")
+    base_version: Optional[str] = Field(None, description="追加学習の元にしたバージョン（全件から学習した場合は null）")
+    trained_at: str
+    active: bool = False
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
+from app.core.wards import ward_from_address
 
 # 共通の物件データ定義
 class PropertyBase(BaseModel):
@@ -14,10 +15,18 @@ class PropertyBase(BaseModel):
     station_distance: int = Field(..., description="駅徒歩（分）")
     floor: int = Field(default=1, description="所在階") # 1階をデフォルトに
     floor_plan: str
+    ward: Optional[str] = Field(None, description="区（shinjuku など）")
     monthly_fee: Optional[float] = Field(None,description="家賃+管理費")
     estimated_price: Optional[float] = Field(None,description="推測値")
     divergence_rate: Optional[float] = Field(None,description="乖離率")
 
+    @model_validator(mode="after")
+    def _fill_ward(self):
+        # 区の指定がなければ住所から判定する（23区以外は None のまま）
+        if self.ward is None:
+            self.ward = ward_from_address(self.address)
+        return self
+
 # スクレイピング時に作成するためのスキーマ
 class PropertyCreate(PropertyBase):
     pass
@@ -30,6 +39,53 @@ class PropertyRead(PropertyBase):
     divergence_rate: Optional[float] = None
     created_at: datetime
     diff_amount: Optional[float] = None
+    scored_at: Optional[datetime] = Field(None, description="最後に採点した日時")
+    model_version: Optional[str] = Field(None, description="採点したモデル（名前/バージョン）")
 
     class Config:
-        from_attributes = True # SQLAlchemyのモデルをPydanticに変換可能にする
\ No newline at end of file
+        from_attributes = True # SQLAlchemyのモデルをPydanticに変換可能にする
+
+# GET /properties の絞り込み条件（min_* / max_* は両端を含む）
+class PropertyFilter(BaseModel):
+    min_price: Optional[float] = Field(None, description="賃料の下限（万円）")
+    max_price: Optional[float] = Field(None, description="賃料の上限（万円）")
+    min_monthly_fee: Optional[float] = Field(None, description="賃料+管理費の下限（円）")
+    max_monthly_fee: Optional[float] = Field(None, description="賃料+管理費の上限（円）")
+    min_liv_area: Optional[float] = Field(None, description="専有面積の下限（m2）")
+    max_liv_area: Optional[float] = Field(None, description="専有面積の上限（m2）")
+    min_age: Optional[int] = Field(None, description="築年数の下限（年）")
+    max_age: Optional[int] = Field(None, description="築年数の上限（年）")
+    min_station_distance: Optional[int] = Field(None, description="駅徒歩の下限（分）")
+    max_station_distance: Optional[int] = Field(None, description="駅徒歩の上限（分）")
+    min_floor: Optional[int] = Field(None, description="所在階の下限")
+    max_floor: Optional[int] = Field(None, description="所在階の上限")
+    min_divergence: Optional[float] = Field(None, description="乖離率の下限")
+    max_divergence: Optional[float] = Field(None, description="乖離率の上限")
+    building_type: Optional[List[str]] = Field(None, description="建物種別（複数指定はOR）")
+    floor_plan: Optional[List[str]] = Field(None, description="間取り（複数指定はOR）")
+    ward: Optional[List[str]] = Field(None, description="区（shinjuku など。複数指定はOR）")
+
+# 並び替えに使える列（値が NULL の物件はその列で並べるときは返さない）
+PropertySort = Literal["created_at", "price", "monthly_fee", "liv_area", "age", "station_distance", "floor", "divergence_rate"]
+SortOrder = Literal["asc", "desc"]
+
+# GET /properties のクエリ全体（FastAPI がクエリパラメータに展開する）
+class PropertyQuery(PropertyFilter):
+    sort: PropertySort = Field("created_at", description="並び替えに使う列（created_at 以外は値のない物件を除く）")
+    order: SortOrder = "asc"
+    limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = Field(None, description="前のレスポンスの next_cursor（同じ sort / order で使う）")
+
+# GET /properties/export のクエリ
+class PropertyExportQuery(PropertyFilter):
+    format: Literal["ndjson", "csv"] = "ndjson"
+
+# GET /properties のページ（next_cursor を次のリクエストの cursor に渡す。最後のページでは null）
+class PropertyPage(BaseModel):
+    items: List[PropertyRead]
+    next_cursor: Optional[str] = Field(None, description="次ページのカーソル")
+
+# お宝ランキング（スナップショット）から返す時のスキーマ
+class BargainRead(PropertyRead):
+    rank: int = Field(..., description="スナップショット内の順位（乖離額の昇順）")
+    snapshot_version: int = Field(..., description="ランキングの元になった分析（analysis_runs.id）")
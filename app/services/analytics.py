@@ -3,6 +3,7 @@ import numpy as np
 from sqlalchemy.orm import Session
 from sklearn.linear_model import LinearRegression
 from app.models.property import Property
+from app.crud import property as crud_property
 import logging
 
 # ログ設定
@@ -49,17 +50,10 @@ class PriceAnalyzer:
         df['rate'] = (y - df['predicted']) / df['predicted']
         df['total_fee'] = y
 
-        # 5. DBへの更新
-        updated_count = 0
-        for index, row in df.iterrows():
-            prop = self.db.query(Property).filter(Property.id == int(row['id'])).first()
-            if prop:
-                prop.estimated_price = float(row['predicted'])
-                prop.divergence_rate = float(row['rate'])
-                prop.monthly_fee = float(row['total_fee'])
-                updated_count += 1
-        
-        self.db.commit()
+        # 5. DBへの更新（一時テーブル経由で1文のUPDATE）
+        updated_count = crud_property.update_estimates_bulk(
+            self.db, df['id'], df['predicted'], df['rate'], df['total_fee']
+        )
         return updated_count
 
 # --- 単体実行用のエントリーポイント ---
@@ -1,101 +1,144 @@
-import pandas as pd
-import numpy as np
 import logging
+import numpy as np
 from sqlalchemy.orm import Session
-from sklearn.linear_model import LinearRegression
-from app.models.property import Property
-from app.services.preprocess import load_and_preprocess_data
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.core.cache import response_cache
+from app.core.wards import WARDS
+from app.crud import property as crud_property
+from app.crud import analysis as crud_analysis
+from app.crud import bargain as crud_bargain
+from app.services import training
+from app.services.preprocess import ANALYSIS_COLUMNS, read_properties
+from app.services.inference import FEATURES, score_groups
+from app.services.model_registry import model_name, registry
 
 logger = logging.getLogger(__name__)
 
 class PriceAnalyzerV2:
     def __init__(self, db: Session):
         self.db = db
-        self.db_url = os.getenv("DATABASE_URL")
+        self.invalid_counts: dict[str, int] = {}  # 直近の分析で採点できなかった行の内訳
+        self.models: dict[str, str] = {}          # 直近の分析で使ったモデル（名前 -> バージョン）
+        self.model_version: str | None = None     # 同上を "名前/バージョン" のカンマ区切りにしたもの
+        self.stale_rows: int | None = None        # 直近の分析で採点対象になった行数（None はモデルがなく採点していない）
 
-    def analyze_and_update(self):
-        # 1. 接続先をDocker内部向けに強制修正
-        db_url = self.db_url.replace("localhost", "db")
-        df_clean = load_and_preprocess_data(db_url)
-        
-        features = ['age', 'log_liv_area', 'station_distance', 'floor']
-        model = LinearRegression().fit(df_clean[features], df_clean['log_total_fee'])
-        r2 = model.score(df_clean[features], df_clean['log_total_fee'])
-        print(f"【モデル精度】決定係数 R^2: {r2:.4f}")
-        logger.info(f"Model trained with R^2: {r2:.4f}")
-        all_properties = self.db.query(Property).all()
-        
-        update_data = []
-        for prop in all_properties:
-            try:
-                # 【重要】画像データに基づき、両方とも「万単位」として扱う
-                # 1.5(万) + 15(万) = 16.5(万) -> 円にするため最後に10000を掛ける
-                actual_fee_man = (prop.price or 0) + (prop.admin_fee or 0)
-                actual_fee = float(actual_fee_man * 10000)
+    def _route_models(self, df) -> list:
+        """
+        区ごとに使うモデルを決め、同じモデルを使う区の行をまとめる。
+        区専用のモデル（model_name(区)）があればそれを、なければ全区共通のモデルを使う。
+        モデルはレジストリの LRU キャッシュから必要になった時だけ読み込まれる。
+        """
+        fallback = registry.get_active(model_name())
+        routes: dict[str, tuple] = {}
+        for ward, idx in df.groupby('ward', dropna=False, sort=False).indices.items():
+            active = (registry.get_active(model_name(ward)) if isinstance(ward, str) else None) or fallback
+            if active is None:
+                continue
+            if active.meta["features"] != FEATURES:
+                raise ValueError(f"Model {active.name}/{active.version} expects features {active.meta['features']}, not {FEATURES}")
+            routes.setdefault(active.name, (active, []))[1].append(idx)
+        return [(active, np.concatenate(parts)) for active, parts in routes.values()]
 
-                log_area = np.log1p(prop.liv_area)
-                X_pred = pd.DataFrame([[prop.age, log_area, prop.station_distance, prop.floor]], columns=features)
-                
-                predicted_fee = np.expm1(model.predict(X_pred)[0])
-                
-                diff_amount = actual_fee - predicted_fee
-                div_rate = diff_amount / predicted_fee
+    def _stale_filter(self):
+        """いま有効なモデル（区ごと）を ACTIVE だけ見て組み立て、採点し直す行の条件を返す（モデルは読み込まない）"""
+        expected = {}
+        for ward in WARDS:
+            version = registry.active_version(model_name(ward))
+            if version:
+                expected[ward] = f"{model_name(ward)}/{version}"
+        default = f"{model_name()}/{registry.active_version(model_name())}"
+        return crud_property.stale_properties_filter(expected, default)
 
-                update_data.append({
-                    "id": prop.id,
-                    "monthly_fee": actual_fee,
-                    "estimated_price": float(predicted_fee),
-                    "divergence_rate": float(div_rate)
-                })
-            except Exception as e:
-                logger.error(f"Error at id {prop.id}: {e}")
-                continue
+    def analyze_and_update(self, full: bool = False):
+        """
+        有効なモデル（model_registry の ACTIVE）で採点し直す。学習はしない。
+        既定では未採点・更新された・古いモデルで採点された行だけを読み、採点・書き戻しする。
+        full=True なら全件を採点し直す。
+        まだ全区共通のモデルがない場合だけ、最初の1回として学習・登録してから採点する。
+        """
+        if registry.get_active(model_name()) is None:
+            logger.info("No active model yet; training the first version.")
+            if training.train_and_register(self.db) is None:
+                return 0
+
+        # 1. 必要な列・必要な行だけを1回だけ読み込む（セッションの接続＝app.core.db のプールを使う）
+        where = None if full else self._stale_filter()
+        # updated_at は書き戻しの時に「読んだ後に書き換えられていないか」を確かめるために持っておく
+        df = read_properties(self.db.connection(), ANALYSIS_COLUMNS + ['updated_at'], where=where)
+        self.stale_rows = len(df)
+        if df.empty:
+            logger.info("No new or changed properties to score.")
+            return 0
+        read_updated_at = df.set_index('id')['updated_at']
+
+        # 2. 区ごとにモデルを振り分け、モデルごとに1回の行列演算で採点する
+        routes = self._route_models(df)
+        scored = score_groups((active.model, df.iloc[idx], f"{active.name}/{active.version}") for active, idx in routes)
+        del df
+        self.models = {active.name: active.version for active, _ in routes}
+        self.model_version = ",".join(f"{name}/{version}" for name, version in self.models.items())
 
-        if update_data:
-            self.db.bulk_update_mappings(Property, update_data)
-            self.db.commit()
-            
-        return len(update_data)
+        # 欠損・不正値で採点できなかった行は1件ずつ例外を拾わず、件数でまとめて報告する
+        self.invalid_counts = scored["invalid"]
+        if self.invalid_counts:
+            logger.warning(f"Skipped rows with missing/invalid values: {self.invalid_counts}")
 
+        # 3. 一時テーブル経由の UPDATE ... FROM 1文で書き戻す
+        # 採点できなかった行も推定値を空にして scored_at を進め、次回の差分に毎回入らないようにする
+        skipped = len(scored["skipped_ids"])
+        nan = np.full(skipped, np.nan)
+        ids = np.concatenate([scored["ids"], scored["skipped_ids"]])
+        written = crud_property.update_estimates_bulk(
+            self.db,
+            ids,
+            np.concatenate([scored["estimated_price"], nan]),
+            np.concatenate([scored["divergence_rate"], nan]),
+            np.concatenate([scored["monthly_fee"], nan]),
+            np.concatenate([scored["tags"], scored["skipped_tags"]]),
+            read_updated_at=read_updated_at.loc[ids].to_list(),
+        )
+        if written < len(ids):
+            # 採点中にクロールが書き換えた行は書き戻さず、次回の /analyze で採点し直す
+            logger.info(f"{len(ids) - written} rows changed while scoring; left for the next run.")
+        updated = len(scored["ids"])
 
-    def get_bargains(self, budget: int = 180000, min_floor: int = 2, max_area: int = 100, limit: int = 20):
-        # メソッドの定義に「limit: int = 20」を追加しました
-        """API用：現在のDBから「お宝リスト」を抽出して返す"""
-        # DBから現在のデータをロード
-        query = self.db.query(Property)
-        # 修正ポイント：.get_bind() を使用
-        df = pd.read_sql(query.statement, self.db.get_bind())
+        # 4. お宝判定に使う乖離率の境界をここで確定させ、/bargains では計算しない
+        # 決定係数は使ったモデルの学習件数で重み付けした平均
+        train_rows = sum(active.meta["metrics"].get("train_rows", 0) for active, _ in routes)
+        r2 = sum(active.meta["metrics"].get("r2_train", 0.0) * active.meta["metrics"].get("train_rows", 0) for active, _ in routes)
+        run = crud_analysis.record_analysis_run(
+            self.db,
+            r2=r2 / train_rows if train_rows else None,
+            train_rows=train_rows,
+            scored_rows=updated,
+            model_version=self.model_version,
+        )
+        logger.info(f"Analysis run {run.id} with models {self.model_version}: divergence lower bound {run.divergence_lower_bound}")
 
-        # 修正ポイント：スペルミスを修正 (estimated_price)
-        df['diff_amount'] = df['monthly_fee'] - df['estimated_price']
+        # 5. お宝ランキングのスナップショットを更新（読み手は /bargains でこれを読むだけ）
+        crud_bargain.refresh_bargain_rankings(self.db)
+        response_cache.bump()
+        return updated
 
-        # 2. 検閲
-        q1 = df['divergence_rate'].quantile(0.25)
-        q3 = df['divergence_rate'].quantile(0.75)
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr 
 
-        # ② フィルタリング実行
-        valid_bargains = df[
-            (df['divergence_rate'] > lower_bound) & 
-            (df['diff_amount'] <= -30000) &          
-            (df['liv_area'] < 100)                   
-        ]
-        
-        # ...ロジックの最後...
-        return valid_bargains.sort_values('diff_amount').head(limit).to_dict(orient="records")
+    def get_bargains(self, budget: int = 180000, min_floor: int = 2, max_area: int = 100, max_diff: int = -30000, limit: int = 20):
+        """API用：最新の分析で作ったランキングのスナップショットから「お宝リスト」を返す"""
+        return crud_bargain.get_bargains(
+            self.db,
+            budget=budget,
+            min_floor=min_floor,
+            max_area=max_area,
+            max_diff=max_diff,
+            limit=limit,
+        )
 
 
 if __name__ == "__main__":
+    import sys
     from app.core.db import SessionLocal
     db = SessionLocal()
     try:
         analyzer = PriceAnalyzerV2(db) # あなたのクラス名に合わせてください
-        count = analyzer.analyze_and_update()
+        count = analyzer.analyze_and_update(full="--full" in sys.argv)
         print(f"成功: {count} 件の物件をV2ロジックで更新しました。")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
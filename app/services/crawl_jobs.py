@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import threading
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.crud import building as crud_building
+from app.crud import crawl_job as crud_crawl_job
+from app.crud import property as crud_property
+from app.crud import crawl_page as crud_crawl_page
+from app.models.crawl_job import (
+    CrawlJob, JOB_QUEUED, JOB_RUNNING, JOB_CANCELLING, JOB_CANCELLED, JOB_SUCCEEDED, JOB_FAILED,
+)
+from app.schemas.building import BuildingCreate
+from app.schemas.property import PropertyCreate
+from app.services.crawler import (
+    AsyncCrawler, HostRateLimiter, PageResult, PAGE_FETCHED, PAGE_FAILED, PAGE_NOT_MODIFIED, PAGE_UNCHANGED,
+)
+from app.services.scraper_v2 import SuumoScraperV2
+
+logger = logging.getLogger(__name__)
+
+class _JobLost(Exception):
+    """ほかのプロセスに failed にされた・再開で別の実行に引き継がれたジョブ（この実行はもう書き込まない）"""
+
+class _PendingBatch:
+    """まだ書き込んでいないページ（ページ番号順）と、その物件"""
+
+    def __init__(self):
+        self.pages: list[PageResult] = []
+        self.properties: list[PropertyCreate] = []
+        self.buildings: list[BuildingCreate] = []
+        self.failed = False
+
+    def add(self, result: PageResult):
+        # 物件は properties にまとめたので、ページ側には持たせない（指紋と状態だけ残す）
+        self.properties.extend(result.properties)
+        self.buildings.extend(result.buildings)
+        self.failed = self.failed or result.status == PAGE_FAILED
+        result.properties, result.buildings = [], []
+        self.pages.append(result)
+
+class CrawlJobRunner:
+    """
+    クロールジョブをAPIのリクエストとは切り離してワーカープールで実行する。
+    進捗は crawl_jobs テーブルに書き込み、キャンセルはページ単位で反映する。
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.CRAWL_JOB_WORKERS,
+            thread_name_prefix="crawl-job",
+        )
+        self._cancel_events: dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+        # 送信ペースはジョブごとではなくプロセス全体で守る（同時に走るジョブが同じホストのバケットを分け合う）
+        self._limiter = HostRateLimiter(settings.CRAWL_RATE_PER_SEC, settings.CRAWL_BURST)
+
+    def submit(self, job_id: int):
+        event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = event
+        self._executor.submit(self._run, job_id, event)
+
+    def cancel(self, job_id: int):
+        """このプロセスで動いているジョブなら即座に止める（別プロセスでもDBの状態で止まる）"""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event:
+            event.set()
+
+    def shutdown(self):
+        with self._lock:
+            for event in self._cancel_events.values():
+                event.set()
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job_id: int, cancel_event: threading.Event):
+        db = SessionLocal()
+        job = None
+        try:
+            job = db.get(CrawlJob, job_id)
+            if job is None:
+                logger.error(f"Crawl job {job_id} not found.")
+                return
+            if cancel_event.is_set() or job.status == JOB_CANCELLING:
+                self._finish(db, job, JOB_CANCELLED)
+                return
+            if job.status != JOB_QUEUED:
+                # 待っている間に、落ちたジョブとして failed にされた（再開すれば改めて登録される）
+                logger.warning(f"Crawl job {job_id} is {job.status}; not starting.")
+                return
+
+            job.status = JOB_RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            job.heartbeat_at = func.now()
+            # この実行の目印。started_at が変わっていたら、ほかの実行に引き継がれている
+            db.info["started_at"] = job.started_at
+            db.commit()
+            if job.checkpoint_ward:
+                logger.info(f"Crawl job {job_id} resuming after {job.checkpoint_ward} page {job.checkpoint_page}.")
+            logger.info(f"Crawl job {job_id} started ({job.pages_requested} pages x {job.wards}).")
+
+            status = asyncio.run(self._crawl(db, job, cancel_event))
+            self._finish(db, job, status)
+            logger.info(
+                f"Crawl job {job_id} {status}: pages={job.pages_done} parsed={job.rows_parsed} "
+                f"inserted={job.rows_inserted} updated={job.rows_updated} errors={job.error_count}"
+            )
+        except _JobLost as e:
+            # 状態・進捗は引き継いだ側（または failed にした側）のものを残す
+            db.rollback()
+            logger.warning(f"Crawl job {job_id} stopped: {e}")
+        except Exception as e:
+            logger.exception(f"Crawl job {job_id} failed: {e}")
+            db.rollback()
+            if job is not None:
+                job.error_count += 1
+                job.last_error = str(e)
+                self._finish(db, job, JOB_FAILED)
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+            db.close()
+
+    async def _crawl(self, db: Session, job: CrawlJob, cancel_event: threading.Event) -> str:
+        """
+        区を順に回す。送信ペースは区・ジョブをまたいで1つのリミッター（self._limiter）で守る。
+        再開したジョブはチェックポイントの区の次のページから続ける（それより前の区は取得済み）。
+        """
+        scraper = SuumoScraperV2(job.wards.split(","))
+        wards = scraper.wards
+        if job.checkpoint_ward in wards:
+            wards = wards[wards.index(job.checkpoint_ward):]
+        for ward in wards:
+            start_page = job.checkpoint_page + 1 if ward == job.checkpoint_ward else 1
+            if start_page <= job.pages_requested:
+                if not await self._crawl_ward(db, job, cancel_event, scraper, ward, self._limiter, start_page):
+                    return JOB_CANCELLED
+            # 打ち切りで途中のページまでしか取らなかった区も、ここで取得済みにする
+            job.checkpoint_ward, job.checkpoint_page = ward, job.pages_requested
+            await asyncio.to_thread(self._save_progress, db, job)
+        return JOB_SUCCEEDED
+
+    async def _crawl_ward(
+        self, db: Session, job: CrawlJob, cancel_event: threading.Event,
+        scraper: SuumoScraperV2, ward: str, limiter: HostRateLimiter, start_page: int = 1,
+    ) -> bool:
+        """
+        1つの区を start_page から job.pages_requested ページまで取得する（キャンセルされたら False）。
+        取得・パース（AsyncCrawler.crawl。行はパース時に PropertyCreate で検証済み）と DB への書き込みを
+        上限つきのキューでつないだ別々のタスクにする。書き込みが遅れればキューが埋まって取得も止まるので、
+        メモリに載るのは先行リクエスト＋キュー＋書きかけのバッチの分だけで、ページ数には比例しない。
+        """
+        url = scraper.ward_url(ward)
+        fingerprints = {}
+        if job.incremental:
+            fingerprints = await asyncio.to_thread(crud_crawl_page.get_fingerprints, db, url)
+        crawler = AsyncCrawler(scraper, fingerprints=fingerprints, ward=ward, limiter=limiter)
+        stop_after = settings.CRAWL_STOP_AFTER_SEEN_PAGES if job.incremental else 0
+        # 既知の物件ばかりかはバッチを書き込むまで分からないので、打ち切るときはバッチを小さくし、
+        # 打ち切った後に捨てることになる先読みも減らす
+        batch_pages = min(settings.CRAWL_BATCH_PAGES, stop_after) if stop_after else settings.CRAWL_BATCH_PAGES
+        queue: asyncio.Queue[PageResult | None] = asyncio.Queue(maxsize=max(1, min(settings.CRAWL_QUEUE_PAGES, batch_pages)))
+
+        async def produce():
+            try:
+                async with aclosing(crawler.crawl(range(start_page, job.pages_requested + 1))) as results:
+                    async for result in results:
+                        await queue.put(result)
+            finally:
+                # 取得が終わった（例外で止まった場合も）ことを知らせる。書き込み側が止めた場合は誰も待っていない
+                if not asyncio.current_task().cancelling():
+                    await queue.put(None)
+
+        lost = asyncio.Event()
+
+        async def heartbeat():
+            # 数ページの取得がリトライで止まっていても、落ちたジョブと間違えられないよう一定間隔で進める
+            started_at = db.info["started_at"]
+            while True:
+                await asyncio.sleep(settings.CRAWL_JOB_HEARTBEAT_SECONDS)
+                if not await asyncio.to_thread(self._beat, job.id, started_at):
+                    lost.set()
+                    await queue.put(None)  # 次のページを待っている書き込み側を起こす
+                    return
+
+        producer = asyncio.create_task(produce())
+        beater = asyncio.create_task(heartbeat())
+        batch = _PendingBatch()
+        seen_streak = 0  # 既知の物件しかないページの連続数
+        finished = False
+        try:
+            while (result := await queue.get()) is not None:
+                if lost.is_set():
+                    break
+                job.rows_parsed += len(result.properties)
+                batch.add(result)
+                if result.status == PAGE_FAILED:
+                    job.error_count += 1
+                    job.last_error = result.error
+                elif result.status in (PAGE_NOT_MODIFIED, PAGE_UNCHANGED):
+                    # 前回と同じ内容 = 載っている物件は全て保存済み
+                    job.pages_skipped += 1
+
+                stopping = cancel_event.is_set() or job.status == JOB_CANCELLING
+                if stopping or len(batch.properties) >= settings.CRAWL_BATCH_ROWS or len(batch.pages) >= batch_pages:
+                    counts = await asyncio.to_thread(self._commit_batch, db, job, ward, url, batch)
+                    # バッチ内に新しい物件が1件もなければ、その全ページを「既知の物件だけ」と数える
+                    seen_streak = seen_streak + len(batch.pages) if counts["inserted"] == 0 and not batch.failed else 0
+                    batch = _PendingBatch()
+                    if cancel_event.is_set() or job.status == JOB_CANCELLING:
+                        return False
+                    if stop_after and seen_streak >= stop_after:
+                        logger.info(f"Crawl job {job.id}: {seen_streak} pages in a row had no new listings in {ward}, stopping at page {result.page}.")
+                        break
+            else:
+                finished = not lost.is_set()
+            if lost.is_set():
+                raise _JobLost("no longer owned by this worker")
+            if batch.pages:
+                await asyncio.to_thread(self._commit_batch, db, job, ward, url, batch)
+            if finished:
+                await producer  # 取得側が例外で止まっていればここで受け取る（それまでのページは書き込み済み）
+        finally:
+            producer.cancel()
+            beater.cancel()
+            await asyncio.gather(producer, beater, return_exceptions=True)
+
+        return True
+
+    def _commit_batch(self, db: Session, job: CrawlJob, ward: str, url: str, batch: "_PendingBatch") -> dict:
+        """
+        溜まったページの物件（全部屋モードなら建物・部屋も）・指紋・チェックポイント・進捗を1トランザクションで書き込む。
+        途中で落ちても「チェックポイントまでのページは保存済み、その先は未保存」が崩れないので、再開時に取り漏れない。
+        """
+        unit_counts = {"inserted": 0, "updated": 0}
+        if batch.buildings:
+            # 件数の集計は properties 側のまま
+            unit_counts = crud_building.upsert_buildings_bulk(db, batch.buildings, commit=False)
+        for result in batch.pages:
+            if result.fingerprint is not None:
+                crud_crawl_page.save_fingerprint(db, url, result.page, result.fingerprint, result.status == PAGE_FETCHED)
+        job.checkpoint_ward, job.checkpoint_page = ward, batch.pages[-1].page
+        ingest = crud_property.INGEST_MODES[settings.INGEST_MODE]
+        counts = ingest(db, batch.properties, commit=False)
+        job.rows_inserted += counts["inserted"]
+        job.rows_updated += counts["updated"]
+        job.pages_done += len(batch.pages)
+        # ここで初めて commit する（失敗すれば全部ロールバックされ、チェックポイントも進まない）
+        self._save_progress(db, job)
+        if counts["inserted"] or counts["updated"] or unit_counts["inserted"] or unit_counts["updated"]:
+            response_cache.bump()
+        return counts
+
+    def _save_progress(self, db: Session, job: CrawlJob):
+        # 書き込む前に行をロックして持ち主か確かめる（落ちたとみなされて failed・再開された後なら書かずにやめる）
+        if not crud_crawl_job.lock_owned_job(db, job.id, db.info["started_at"]):
+            raise _JobLost("marked failed or resumed elsewhere")
+        job.heartbeat_at = func.now()
+        db.commit()
+        # commit後の再読み込みで、他のセッションから立てられたキャンセル要求も拾う
+        db.refresh(job)
+
+    def _beat(self, job_id: int, started_at: datetime) -> bool:
+        """heartbeat_at だけを別のセッションで進める（ジョブのセッションは書き込み側のスレッドが使っている）"""
+        db = SessionLocal()
+        try:
+            return crud_crawl_job.touch_heartbeat(db, job_id, started_at)
+        finally:
+            db.close()
+
+    def _finish(self, db: Session, job: CrawlJob, status: str):
+        started_at = db.info.get("started_at")
+        if started_at is not None and not crud_crawl_job.lock_owned_job(db, job.id, started_at):
+            # 走り始めた後に failed にされた・引き継がれたジョブの状態は上書きしない
+            db.rollback()
+            logger.warning(f"Crawl job {job.id} is no longer owned by this worker; leaving its status as is.")
+            return
+        job.status = status
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        if settings.EXTRACTION_MODE == "grouped" and job.pages_done:
+            # 建物ごとの集計（GET /buildings）はバッチごとではなくジョブの終わりに1回だけ作り直す
+            # （失敗・キャンセルでも、それまでのバッチは書き込み済みなので作り直す）
+            try:
+                crud_building.refresh_building_stats(db)
+                response_cache.bump()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Crawl job {job.id}: building stats were not refreshed: {e}")
+
+
+runner = CrawlJobRunner()
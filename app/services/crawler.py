@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.schemas.building import BuildingCreate
+from app.schemas.crawl_page import PageFingerprint
+from app.schemas.property import PropertyCreate
+from app.services.page_archive import PageArchive, archive as page_archive
+from app.services.scraper_v2 import SuumoScraperV2, first_room_properties, parse_listing_buildings, parse_listing_page
+
+logger = logging.getLogger(__name__)
+
+# 一時的な障害とみなしてリトライするステータス
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレートリミッター（rate 件/秒、最大 burst 件まで連続可）。
+    クロールジョブはジョブごとに別スレッド・別のイベントループで動くので、残りトークンは threading.Lock で守り、
+    複数のジョブ（ループ）で1つのバケットを共有できるようにする。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """1件分を予約し、送ってよい時刻までの待ち秒数を返す（残りがマイナスなら先に予約した分の後ろに並ぶ）"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self):
+        # 予約は到着順なので、待機中のリクエストはループをまたいでも到着順に並ぶ
+        # （待機中にキャンセルされた分は返さない。ペースが遅くなる側にしかずれない）
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostRateLimiter:
+    """ホスト名ごとにトークンバケットを持つ（スレッドセーフ。クロールジョブ間で1つを共有する）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor | None:
+    """
+    パース用のプロセスプール（PARSE_WORKERS=0 なら None）。クロールジョブ間で使い回す。
+    API はスレッドを抱えたまま fork すると危ないので spawn で起動する。
+    """
+    global _parse_pool
+    if settings.PARSE_WORKERS <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+
+def shutdown_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=True, cancel_futures=True)
+            _parse_pool = None
+
+
+# ページ取得結果の種別
+PAGE_FETCHED = "fetched"            # 取得してパースした
+PAGE_NOT_MODIFIED = "not_modified"  # 304（条件付きリクエストで本文なし）
+PAGE_UNCHANGED = "unchanged"        # 本文のハッシュが前回と同じなのでパースを省略
+PAGE_FAILED = "failed"
+
+
+@dataclass
+class PageResult:
+    page: int
+    ward: str | None = None
+    properties: list[PropertyCreate] = field(default_factory=list)
+    # EXTRACTION_MODE="grouped" のときだけ埋まる（全部屋。properties には各建物の最初の部屋が入る）
+    buildings: list[BuildingCreate] = field(default_factory=list)
+    error: str | None = None
+    status: str = PAGE_FETCHED
+    fingerprint: PageFingerprint | None = None
+
+
+class AsyncCrawler:
+    """
+    SuumoScraperV2 の一覧ページ（1つの区）を非同期で並行取得するクローラー。
+    同時リクエスト数は concurrency、送信ペースはホスト単位のトークンバケットで制御する。
+    複数の区を順に回すときは limiter を共有して、区をまたいでもペースを守る。
+    ダウンロード（download）とパース（parse）は別の段階で、パースはプロセスプールで行うので
+    CPU を使うパースが通信中のイベントループを止めない。
+    """
+
+    def __init__(
+        self,
+        scraper: SuumoScraperV2 | None = None,
+        concurrency: int | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+        max_retries: int | None = None,
+        timeout: float | None = None,
+        fingerprints: dict[int, PageFingerprint] | None = None,
+        ward: str | None = None,
+        limiter: HostRateLimiter | None = None,
+        parse_pool: ProcessPoolExecutor | None = None,
+        archive: PageArchive | None = None,
+        extraction_mode: str | None = None,
+    ):
+        self.scraper = scraper or SuumoScraperV2()
+        self.ward = ward or self.scraper.wards[0]
+        self.url = self.scraper.ward_url(self.ward)
+        # ページ番号 -> 前回の指紋。渡された場合は差分クロールになる
+        self.fingerprints = fingerprints or {}
+        self.concurrency = max(1, concurrency or settings.CRAWL_CONCURRENCY)
+        self.max_retries = settings.CRAWL_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or settings.CRAWL_TIMEOUT
+        self.limiter = limiter or HostRateLimiter(
+            rate or settings.CRAWL_RATE_PER_SEC,
+            burst or settings.CRAWL_BURST,
+        )
+        self.parse_pool = parse_pool or get_parse_pool()
+        self.extraction_mode = extraction_mode or settings.EXTRACTION_MODE
+        # 取得した本文はすべて保存しておく（ARCHIVE_PAGES=False なら保存しない）
+        self.archive = archive or (page_archive if settings.ARCHIVE_PAGES else None)
+
+    def _client(self) -> httpx.AsyncClient:
+        # 接続はプールして使い回す（ページごとにTCP/TLSを張り直さない）
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        return httpx.AsyncClient(
+            headers=self.scraper.headers,
+            timeout=self.timeout,
+            limits=limits,
+            follow_redirects=True,
+        )
+
+    def _backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        """Full Jitter 方式の指数バックオフ（Retry-After があればそれ以上待つ）"""
+        cap = min(settings.CRAWL_BACKOFF_MAX, settings.CRAWL_BACKOFF_BASE * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    async def _get(self, client: httpx.AsyncClient, url: str, params: dict, headers: dict | None = None) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(url)
+            retry_after = None
+            try:
+                res = await client.get(url, params=params, headers=headers)
+                if res.status_code == 304:
+                    return res
+                if res.status_code not in RETRY_STATUSES:
+                    res.raise_for_status()
+                    return res
+                retry_after = res.headers.get("Retry-After")
+                error = f"HTTP {res.status_code}"
+            except httpx.TransportError as e:
+                error = repr(e)
+
+            if attempt >= self.max_retries:
+                raise RuntimeError(f"giving up after {attempt + 1} attempts: {error}")
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"GET {url} {params} failed ({error}), retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _conditional_headers(self, previous: PageFingerprint | None) -> dict:
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+        return headers
+
+    async def download(self, client: httpx.AsyncClient, page: int) -> tuple[PageResult, str | None]:
+        """1ページを取得する。パースが必要なら (結果, HTML)、不要なら (結果, None)"""
+        previous = self.fingerprints.get(page)
+        try:
+            res = await self._get(
+                client, self.url, self.scraper.page_params(page),
+                headers=self._conditional_headers(previous),
+            )
+        except Exception as e:
+            logger.error(f"{self.ward} page {page} fetch failed: {e}")
+            return PageResult(page=page, ward=self.ward, error=str(e), status=PAGE_FAILED), None
+
+        if res.status_code == 304:
+            return PageResult(page=page, ward=self.ward, status=PAGE_NOT_MODIFIED, fingerprint=previous), None
+
+        if self.archive is not None:
+            try:
+                await asyncio.to_thread(self.archive.put, res.text, self.url, self.ward, page)
+            except OSError as e:
+                # 保存に失敗してもクロール自体は続ける
+                logger.warning(f"{self.ward} page {page} could not be archived: {e}")
+
+        fingerprint = PageFingerprint(
+            content_hash=self.scraper.content_hash(res.text),
+            etag=res.headers.get("ETag"),
+            last_modified=res.headers.get("Last-Modified"),
+        )
+        if previous is not None and previous.content_hash == fingerprint.content_hash:
+            return PageResult(page=page, ward=self.ward, status=PAGE_UNCHANGED, fingerprint=fingerprint), None
+        return PageResult(page=page, ward=self.ward, fingerprint=fingerprint), res.text
+
+    async def parse(self, result: PageResult, html: str) -> PageResult:
+        """HTML をパースして result.properties（grouped なら result.buildings も）を埋める（プロセスプールがなければ別スレッドで）"""
+        grouped = self.extraction_mode == "grouped"
+        try:
+            if self.parse_pool is None:
+                parse = self.scraper.parse_buildings if grouped else self.scraper.parse_page
+                parsed = await asyncio.to_thread(parse, html, result.page, self.ward)
+            else:
+                parsed = await asyncio.get_running_loop().run_in_executor(
+                    self.parse_pool, parse_listing_buildings if grouped else parse_listing_page,
+                    html, result.page, self.ward, self.scraper.backend,
+                )
+            if grouped:
+                result.buildings = parsed
+                result.properties = first_room_properties(parsed)
+            else:
+                result.properties = parsed
+        except Exception as e:
+            logger.error(f"{self.ward} page {result.page} parse failed: {e}")
+            # 指紋を残すと次回の差分クロールで「変更なし」として読み飛ばされるので捨てる
+            result.error = str(e)
+            result.status = PAGE_FAILED
+            result.fingerprint = None
+        return result
+
+    async def fetch_page(self, client: httpx.AsyncClient, page: int) -> PageResult:
+        result, html = await self.download(client, page)
+        return result if html is None else await self.parse(result, html)
+
+    async def crawl(self, pages: Iterable[int]) -> AsyncIterator[PageResult]:
+        """
+        ページを並行取得し、結果をページ番号順に返す非同期ジェネレーター。
+        常に最大 concurrency 件のリクエストを先行して走らせておく。
+        """
+        page_iter = iter(pages)
+        async with self._client() as client:
+            tasks: deque[asyncio.Task] = deque()
+
+            def fill():
+                while len(tasks) < self.concurrency:
+                    page = next(page_iter, None)
+                    if page is None:
+                        return
+                    tasks.append(asyncio.create_task(self.fetch_page(client, page)))
+
+            try:
+                fill()
+                while tasks:
+                    result = await tasks.popleft()
+                    fill()
+                    yield result
+            finally:
+                # 途中で打ち切られた場合は先行リクエストを片付ける
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def crawl_all(self, pages: Iterable[int]) -> list[PropertyCreate]:
+        started = time.monotonic()
+        all_properties: list[PropertyCreate] = []
+        failed = 0
+        async for result in self.crawl(pages):
+            if result.error:
+                failed += 1
+            all_properties.extend(result.properties)
+        logger.info(
+            f"Crawl finished: {len(all_properties)} properties, {failed} failed pages "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        return all_properties
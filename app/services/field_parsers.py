@@ -0,0 +1,62 @@
+import re
+from functools import lru_cache
+
+# 一覧ページの欄（生の文字列）を数値にする。SuumoScraper / SuumoScraperV2 で共通。
+# 同じ文字列（"新築"・"歩5分"・"2階"・"-" など）がページをまたいで何度も出てくるので、
+# 正規表現は読み込み時に1回だけコンパイルし、変換結果は文字列ごとに LRU で覚えておく。
+# どの関数も引数だけで結果が決まる（覚えた値を返しても同じ）ので、キャッシュしても挙動は変わらない。
+
+CACHE_SIZE = 4096  # 関数ごとに覚えておく文字列の数
+
+_NUMBER = re.compile(r"(\d+\.?\d*)")
+_DIGITS = re.compile(r"(\d+)")
+_MINUTES = re.compile(r"(\d+)分")
+_YEARS = re.compile(r"(\d+)年")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_numeric(text: str) -> float:
+    """数値だけを抽出（'15.5万円' -> 15.5, '15,000円' -> 15000.0）。'-'・'別途' などは 0.0"""
+    if not text or text == "-" or "別" in text:
+        return 0.0
+    match = _NUMBER.search(text.replace(",", ""))
+    return float(match.group(1)) if match else 0.0
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_floor(text: str) -> int:
+    """'1-2階' -> 1, 'B1階' -> -1, 'B1-2階' -> -1。取れない場合は1階とみなす"""
+    if not text or text == "-":
+        return 1
+    # 範囲指定（1-2階など）の場合は最初の数字
+    first_part = text.split("-")[0]
+    match = _DIGITS.search(first_part)
+    if not match:
+        return 1
+    val = int(match.group(1))
+    # 地下判定
+    if "B" in first_part or "地下" in first_part:
+        return -val
+    return val
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_walk_time(text: str) -> int:
+    """'JR山手線/新宿駅 歩5分' -> 5（取れない場合は 0）"""
+    match = _MINUTES.search(text or "")
+    return int(match.group(1)) if match else 0
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_age(text: str) -> int:
+    """'築10年' -> 10, '新築' -> 0（取れない場合は 0）"""
+    if not text or "新築" in text:
+        return 0
+    # 以前は '"0年" in text' を新築扱いにしていたため、築10年・築20年… が 0 になっていた
+    match = _YEARS.search(text)
+    return int(match.group(1)) if match else 0
+
+
+def cache_info() -> dict:
+    """関数ごとのキャッシュのヒット数など（ベンチマーク・調査用）"""
+    return {f.__name__: f.cache_info()._asdict() for f in (clean_numeric, parse_floor, parse_walk_time, parse_age)}
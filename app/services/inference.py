@@ -0,0 +1,105 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 学習・推論で使う特徴量（この順番で行列を組む）
+FEATURES = ['age', 'log_liv_area', 'station_distance', 'floor']
+
+
+def build_feature_matrix(age, liv_area, station_distance, floor):
+    """
+    列ごとの配列から特徴量行列 X (n, 4) を組み立てる。
+    欠損・不正値を含む行は valid=False として返す（例外は投げない）。
+    """
+    age = np.asarray(age, dtype=np.float64)
+    liv_area = np.asarray(liv_area, dtype=np.float64)
+    station_distance = np.asarray(station_distance, dtype=np.float64)
+    floor = np.asarray(floor, dtype=np.float64)
+
+    # log1p は -1 以下で壊れるので、面積が負の行は先に除外してから変換する
+    area_ok = np.isfinite(liv_area) & (liv_area >= 0)
+    log_liv_area = np.log1p(np.where(area_ok, liv_area, 0.0))
+
+    X = np.column_stack([age, log_liv_area, station_distance, floor])
+    valid = area_ok & np.isfinite(X).all(axis=1)
+    return X, valid
+
+
+def predict_log_fee(model, X: np.ndarray) -> np.ndarray:
+    """
+    対数家賃の予測。線形モデルなら係数との行列積1回で済ませ、
+    sklearn の入力検証（DataFrame化・列名チェック）を通さない。
+    """
+    if X.shape[0] == 0:
+        return np.empty(0)
+    coef = getattr(model, "coef_", None)
+    if coef is not None and np.ndim(coef) == 1:
+        return X @ np.asarray(coef, dtype=np.float64) + float(model.intercept_)
+    return np.asarray(model.predict(X), dtype=np.float64)
+
+
+def score_properties(model, data, X: np.ndarray | None = None, valid_features: np.ndarray | None = None) -> dict:
+    """
+    全物件をまとめて採点し、DB更新用の配列と除外件数を返す。
+    data は id / price / admin_fee / age / liv_area / station_distance / floor 列を持つ DataFrame（または dict）。
+    学習側で組んだ特徴量行列があれば X / valid_features として渡すと作り直さない。
+    金額は「万円」で保存されているので、円に直して比較する。
+    """
+    ids = np.asarray(data["id"])
+    price = np.asarray(data["price"], dtype=np.float64)
+    admin_fee = np.nan_to_num(np.asarray(data["admin_fee"], dtype=np.float64), nan=0.0)  # 管理費なしは0円
+
+    if X is None:
+        X, valid_features = build_feature_matrix(
+            data["age"], data["liv_area"], data["station_distance"], data["floor"]
+        )
+    valid_price = np.isfinite(price)
+    valid = valid_features & valid_price
+
+    predicted_fee = np.full(len(ids), np.nan)
+    predicted_fee[valid] = np.expm1(predict_log_fee(model, X[valid]))
+    valid_prediction = np.isfinite(predicted_fee) & (predicted_fee > 0)
+
+    invalid = {
+        "invalid_features": int((~valid_features).sum()),
+        "missing_price": int((valid_features & ~valid_price).sum()),
+        "invalid_prediction": int((valid & ~valid_prediction).sum()),
+    }
+    mask = valid & valid_prediction
+
+    actual_fee = (price[mask] + admin_fee[mask]) * 10000
+    estimated = predicted_fee[mask]
+    return {
+        "ids": ids[mask],
+        "monthly_fee": actual_fee,
+        "estimated_price": estimated,
+        "divergence_rate": (actual_fee - estimated) / estimated,
+        "skipped_ids": ids[~mask],
+        "invalid": {k: v for k, v in invalid.items() if v},
+    }
+
+
+def score_groups(groups) -> dict:
+    """
+    (モデル, DataFrame, タグ) の組ごとに score_properties を1回ずつ呼び、結果を1つにまとめる。
+    区ごとのモデルを使う場合も、呼び出し回数は行数ではなくモデルの数だけで済む。
+    "tags" / "skipped_tags" は各行を採点したモデルのタグ（ids / skipped_ids と同じ並び）。
+    """
+    parts, tags, skipped_tags = [], [], []
+    for model, data, tag in groups:
+        if len(data):
+            part = score_properties(model, data)
+            parts.append(part)
+            tags.append(np.full(len(part["ids"]), tag, dtype=object))
+            skipped_tags.append(np.full(len(part["skipped_ids"]), tag, dtype=object))
+    invalid: dict[str, int] = {}
+    for part in parts:
+        for k, v in part["invalid"].items():
+            invalid[k] = invalid.get(k, 0) + v
+    keys = ("ids", "monthly_fee", "estimated_price", "divergence_rate", "skipped_ids")
+    merged = {k: np.concatenate([p[k] for p in parts]) if parts else np.empty(0) for k in keys}
+    merged["tags"] = np.concatenate(tags) if tags else np.empty(0, dtype=object)
+    merged["skipped_tags"] = np.concatenate(skipped_tags) if skipped_tags else np.empty(0, dtype=object)
+    merged["invalid"] = invalid
+    return merged
@@ -0,0 +1,192 @@
+from bs4 import BeautifulSoup, Tag
+
+# SUUMO の一覧ページ（.cassetteitem）から、建物ごとの欄と部屋の欄を生の文字列のまま取り出す
+# （extract_rows は最初の1部屋だけ、extract_buildings は全部屋）。
+# 数値への変換は SuumoScraperV2 側で行い、ここでは HTML を読むだけにする。
+#
+# パーサーは差し替えられる（PARSER_BACKENDS）。どのパーサーでも同じ規則で読むよう、
+# バックエンドごとに違うのは「木のたどり方」だけにしてある。
+#   bs4        … BeautifulSoup + html.parser（純 Python。依存が少ないが遅い）
+#   lxml       … libxml2
+#   selectolax … lexbor（最速）
+# フィールドごとに CSS セレクタで探し直す代わりに、建物・部屋の要素をそれぞれ1回ずつなめて
+# class 名から欄を埋める。
+
+# 建物の欄（class 名 -> 欄）。同じ class が複数あれば最初のもの
+BUILDING_CLASSES = {
+    "cassetteitem_content-title": "title",
+    "cassetteitem_detail-col1": "address",
+    "cassetteitem_detail-text": "walk",       # 最寄り駅（col2 の最初の行）
+    "ui-pct--util1": "building_type",
+}
+AGE_CLASS = "cassetteitem_detail-col3"        # 最初の子 div が築年数
+ROOMS_CLASS = "cassetteitem_other"            # 部屋の表（tbody の最初の tr だけを読む）
+
+# 部屋の欄（階は3列目の td）
+ROOM_CLASSES = {
+    "cassetteitem_other-emphasis": "rent",
+    "cassetteitem_price--administration": "admin_fee",
+    "cassetteitem_menseki": "liv_area",
+    "cassetteitem_madori": "floor_plan",
+}
+FLOOR_COLUMN = 2
+
+BUILDING_FIELDS = ["title", "address", "age", "walk", "building_type"]
+ROOM_FIELDS = ["rent", "admin_fee", "liv_area", "floor", "floor_plan"]
+FIELDS = BUILDING_FIELDS + ROOM_FIELDS
+
+
+class _Bs4:
+    @staticmethod
+    def cassettes(html):
+        return BeautifulSoup(html, "html.parser").select(".cassetteitem")
+
+    @staticmethod
+    def descendants(node):
+        return (el for el in node.descendants if isinstance(el, Tag))
+
+    @staticmethod
+    def children(node):
+        return node.find_all(True, recursive=False)
+
+    @staticmethod
+    def classes(node):
+        return node.get("class") or ()
+
+    @staticmethod
+    def tag(node):
+        return node.name
+
+    @staticmethod
+    def text(node):
+        return node.get_text().strip()
+
+
+class _Lxml:
+    @staticmethod
+    def cassettes(html):
+        import lxml.html
+        return lxml.html.fromstring(html).find_class("cassetteitem")
+
+    @staticmethod
+    def descendants(node):
+        # コメント・処理命令は tag が文字列でないので飛ばす
+        return (el for el in node.iterdescendants() if isinstance(el.tag, str))
+
+    @staticmethod
+    def children(node):
+        return [el for el in node.iterchildren() if isinstance(el.tag, str)]
+
+    @staticmethod
+    def classes(node):
+        return (node.get("class") or "").split()
+
+    @staticmethod
+    def tag(node):
+        return node.tag
+
+    @staticmethod
+    def text(node):
+        return node.text_content().strip()
+
+
+class _Selectolax:
+    @staticmethod
+    def cassettes(html):
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser(html).css(".cassetteitem")
+
+    @staticmethod
+    def descendants(node):
+        walk = node.traverse()
+        next(walk, None)  # traverse は自分自身から始まる
+        return (el for el in walk if not el.tag.startswith("-"))
+
+    @staticmethod
+    def children(node):
+        return [el for el in node.iter() if not el.tag.startswith("-")]
+
+    @staticmethod
+    def classes(node):
+        return (node.attributes.get("class") or "").split()
+
+    @staticmethod
+    def tag(node):
+        return node.tag
+
+    @staticmethod
+    def text(node):
+        return node.text(deep=True).strip()
+
+
+PARSER_BACKENDS = {"bs4": _Bs4, "lxml": _Lxml, "selectolax": _Selectolax}
+
+
+def _rooms(b, table) -> list:
+    """部屋の表の tbody の tr"""
+    for section in b.children(table):
+        if b.tag(section) == "tbody":
+            return [row for row in b.children(section) if b.tag(row) == "tr"]
+    return []
+
+
+def _read_room(b, room) -> dict:
+    fields = {}
+    for el in b.descendants(room):
+        for cls in b.classes(el):
+            field = ROOM_CLASSES.get(cls)
+            if field and field not in fields:
+                fields[field] = b.text(el)
+    cells = [el for el in b.children(room) if b.tag(el) == "td"]
+    fields["floor"] = b.text(cells[FLOOR_COLUMN]) if len(cells) > FLOOR_COLUMN else ""
+    return {field: fields.get(field, "") for field in ROOM_FIELDS}
+
+
+def _read_cassette(b, cassette, all_rooms: bool) -> dict | None:
+    """建物の欄と部屋の欄（all_rooms なら全部屋、でなければ最初の1部屋）。部屋がなければ None"""
+    building = {}
+    rooms = None
+    for el in b.descendants(cassette):
+        for cls in b.classes(el):
+            field = BUILDING_CLASSES.get(cls)
+            if field and field not in building:
+                building[field] = b.text(el)
+            elif cls == AGE_CLASS and "age" not in building:
+                first = next(iter(b.children(el)), None)
+                building["age"] = b.text(first) if first is not None and b.tag(first) == "div" else ""
+            elif cls == ROOMS_CLASS:
+                rooms = _rooms(b, el)
+        if rooms is not None:
+            break  # ここから先は部屋の表なので、建物の欄はもう出てこない
+    if not rooms:
+        return None
+
+    building = {field: building.get(field, "") for field in BUILDING_FIELDS}
+    building["rooms"] = [_read_room(b, room) for room in (rooms if all_rooms else rooms[:1])]
+    return building
+
+
+def _read_cassettes(html: str, backend: str, all_rooms: bool) -> list[dict]:
+    b = PARSER_BACKENDS[backend]
+    if not html or not html.strip():
+        return []
+    buildings = []
+    for cassette in b.cassettes(html):
+        building = _read_cassette(b, cassette, all_rooms)
+        if building is not None:
+            buildings.append(building)
+    return buildings
+
+
+def extract_rows(html: str, backend: str = "lxml") -> list[dict]:
+    """一覧ページの建物ごとに、最初の1部屋の欄（FIELDS）を文字列のまま返す（部屋がない建物は飛ばす）"""
+    rows = []
+    for building in _read_cassettes(html, backend, all_rooms=False):
+        room = building.pop("rooms")[0]
+        rows.append({**building, **room})
+    return rows
+
+
+def extract_buildings(html: str, backend: str = "lxml") -> list[dict]:
+    """建物ごとに建物の欄（BUILDING_FIELDS）と全部屋の欄（rooms: ROOM_FIELDS のリスト）を返す"""
+    return _read_cassettes(html, backend, all_rooms=True)
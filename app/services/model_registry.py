@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import joblib
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+ACTIVE_FILE = "ACTIVE"
+
+
+@dataclass
+class RegisteredModel:
+    name: str
+    version: str
+    model: object
+    meta: dict
+
+
+class ModelRegistry:
+    """
+    学習済みモデルのファイル置き場。
+      {root}/{name}/{version}/model.joblib  … 推定器
+      {root}/{name}/{version}/meta.json     … 特徴量の並び・評価指標・学習データの指紋・学習日時
+      {root}/{name}/ACTIVE                  … API が使うバージョン
+    バージョンは一度書いたら変更しない（作り直すときは新しいバージョンにする）。
+    """
+
+    def __init__(self, root: str, cache_size: int = 8):
+        self.root = root
+        # 読み込み済みのモデル（区ごとのモデルが増えてもメモリが増え続けないよう LRU で上限を設ける）
+        self.cache_size = max(1, cache_size)
+        self._loaded: OrderedDict[str, RegisteredModel] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _dir(self, name: str, version: str | None = None) -> str:
+        return os.path.join(self.root, name, version) if version else os.path.join(self.root, name)
+
+    def save(self, name: str, model, meta: dict) -> str:
+        """新しいバージョンとして保存し、そのバージョン名を返す（書き終えてから rename するので途中の状態は見えない）"""
+        os.makedirs(self._dir(name), exist_ok=True)
+        version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        meta = {**meta, "name": name, "version": version}
+
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self._dir(name))
+        try:
+            joblib.dump(model, os.path.join(tmp, MODEL_FILE))
+            with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.rename(tmp, self._dir(name, version))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        logger.info(f"Saved model {name}/{version}")
+        return version
+
+    def versions(self, name: str) -> list[dict]:
+        """保存済みバージョンの meta を新しい順に返す"""
+        if not os.path.isdir(self._dir(name)):
+            return []
+        metas = []
+        for version in os.listdir(self._dir(name)):
+            path = os.path.join(self._dir(name, version), META_FILE)
+            if not version.startswith(".") and os.path.isfile(path):
+                with open(path, encoding="utf-8") as f:
+                    metas.append(json.load(f))
+        return sorted(metas, key=lambda m: m["version"], reverse=True)
+
+    def active_version(self, name: str) -> str | None:
+        try:
+            with open(os.path.join(self._dir(name), ACTIVE_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def activate(self, name: str, version: str):
+        """ACTIVE を差し替える（os.replace なので読み手は新旧どちらかを必ず読める）"""
+        if not os.path.isfile(os.path.join(self._dir(name, version), MODEL_FILE)):
+            raise KeyError(f"{name}/{version} is not registered")
+        tmp = os.path.join(self._dir(name), f".{ACTIVE_FILE}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self._dir(name), ACTIVE_FILE))
+        logger.info(f"Activated model {name}/{version}")
+
+    def load(self, name: str, version: str) -> RegisteredModel:
+        path = self._dir(name, version)
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        return RegisteredModel(name=name, version=version, model=joblib.load(os.path.join(path, MODEL_FILE)), meta=meta)
+
+    def get_active(self, name: str) -> RegisteredModel | None:
+        """
+        有効なモデルを返す。読み込みはバージョンが変わったときだけで、普段は ACTIVE を読むだけ。
+        （他のワーカーが activate した場合もここで追従する）
+        """
+        version = self.active_version(name)
+        if version is None:
+            return None
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is None or loaded.version != version:
+                loaded = self.load(name, version)
+                self._loaded[name] = loaded
+                logger.info(f"Loaded model {name}/{version}")
+            self._loaded.move_to_end(name)
+            while len(self._loaded) > self.cache_size:
+                evicted, _ = self._loaded.popitem(last=False)
+                logger.info(f"Evicted model {evicted} from the cache")
+            return loaded
+
+
+def model_name(ward: str | None = None) -> str:
+    """API が使うモデル名。区ごとのモデルは「{MODEL_NAME}-{区}」、全区共通は MODEL_NAME"""
+    return f"{settings.MODEL_NAME}-{ward}" if ward else settings.MODEL_NAME
+
+
+registry = ModelRegistry(settings.MODEL_DIR, settings.MODEL_CACHE_SIZE)
@@ -0,0 +1,156 @@
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from app.services.inference import FEATURES, build_feature_matrix
+from app.services.preprocess import ANALYSIS_COLUMNS, read_properties, training_mask
+
+logger = logging.getLogger(__name__)
+
+# 候補の特徴量（この順で行列を1本だけ組み、特徴量セットは列番号で選ぶ）
+ALL_FEATURES = FEATURES + ['is_mansion']
+
+FEATURE_SETS = {
+    "base": FEATURES,
+    "no_floor": [f for f in FEATURES if f != 'floor'],
+    "mansion": FEATURES + ['is_mansion'],
+}
+
+
+@dataclass
+class Candidate:
+    name: str
+    estimator: object
+
+
+def default_candidates() -> list[Candidate]:
+    """比較する推定器。正則化つきの線形モデルは特徴量の単位がばらばらなので標準化してから当てる"""
+    candidates = [Candidate("ols", LinearRegression())]
+    candidates += [Candidate(f"ridge(alpha={a:g})", make_pipeline(StandardScaler(), Ridge(alpha=a))) for a in (0.1, 1.0, 10.0)]
+    candidates += [Candidate(f"lasso(alpha={a:g})", make_pipeline(StandardScaler(), Lasso(alpha=a))) for a in (1e-4, 1e-3, 1e-2)]
+    candidates += [
+        Candidate(f"hgb(lr={lr:g},depth={d})", HistGradientBoostingRegressor(learning_rate=lr, max_depth=d, random_state=42))
+        for lr in (0.05, 0.1) for d in (3, 6)
+    ]
+    return candidates
+
+
+def build_dataset(source, ward: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """学習と同じ条件で絞り込んだ (X, y)。X の列は ALL_FEATURES、y は対数家賃（log1p(円)）"""
+    df = read_properties(source, ANALYSIS_COLUMNS)
+    df = df.sort_values('id', ignore_index=True)
+    if ward:
+        df = df[df['ward'] == ward].reset_index(drop=True)
+    X, valid = build_feature_matrix(df['age'], df['liv_area'], df['station_distance'], df['floor'])
+    is_mansion = df['building_type'].str.contains('マンション', na=False).to_numpy(dtype=np.float64)
+    mask = training_mask(df) & valid
+    X = np.column_stack([X, is_mansion])[mask]
+    y = np.log1p((df['price'].to_numpy(dtype=np.float64) + df['admin_fee'].to_numpy(dtype=np.float64)) * 10000)[mask]
+    return X, y
+
+
+def _run_fold(candidate: Candidate, feature_set: str, fold: int, X, y, train_idx, test_idx) -> dict:
+    """1つの (候補, 特徴量セット, fold) を学習・評価する（ワーカープロセスで実行される）"""
+    cols = [ALL_FEATURES.index(f) for f in FEATURE_SETS[feature_set]]
+    X_train, X_test = X[np.ix_(train_idx, cols)], X[np.ix_(test_idx, cols)]
+
+    model = clone(candidate.estimator)
+    started = time.perf_counter()
+    model.fit(X_train, y[train_idx])
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    log_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - started
+
+    y_test = y[test_idx]
+    return {
+        "candidate": candidate.name,
+        "features": feature_set,
+        "fold": fold,
+        "r2": r2_score(y_test, log_pred),
+        "mae_yen": mean_absolute_error(np.expm1(y_test), np.expm1(log_pred)),
+        "fit_ms": fit_seconds * 1000,
+        "predict_us_per_row": predict_seconds * 1e6 / max(1, len(test_idx)),
+    }
+
+
+def cross_validate_candidates(
+    X: np.ndarray,
+    y: np.ndarray,
+    candidates: list[Candidate] | None = None,
+    feature_sets: list[str] | None = None,
+    folds: int = 5,
+    n_jobs: int = -1,
+) -> pd.DataFrame:
+    """
+    候補 × 特徴量セット × fold をプロセスプールで並列に回し、リーダーボード（平均の良い順）を返す。
+    X / y は一度だけ一時ディレクトリに書いてメモリマップで開き直すので、ワーカーはコピーを持たずに同じページを共有する。
+    各ワーカーの中はシングルスレッドにして、勾配ブースティングの OpenMP とプロセス並列が食い合わないようにする。
+    """
+    candidates = candidates or default_candidates()
+    feature_sets = feature_sets or list(FEATURE_SETS)
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=42).split(X))
+
+    with tempfile.TemporaryDirectory(prefix="model-selection-") as tmp:
+        joblib.dump(X, os.path.join(tmp, "X.joblib"))
+        joblib.dump(y, os.path.join(tmp, "y.joblib"))
+        X = joblib.load(os.path.join(tmp, "X.joblib"), mmap_mode="r")
+        y = joblib.load(os.path.join(tmp, "y.joblib"), mmap_mode="r")
+
+        tasks = [
+            delayed(_run_fold)(candidate, feature_set, fold, X, y, train_idx, test_idx)
+            for candidate in candidates
+            for feature_set in feature_sets
+            for fold, (train_idx, test_idx) in enumerate(splits)
+        ]
+        logger.info(f"Cross-validating {len(tasks)} fits on {len(y)} rows")
+        with parallel_config(backend="loky", inner_max_num_threads=1):
+            results = Parallel(n_jobs=n_jobs)(tasks)
+
+    scores = pd.DataFrame(results)
+    board = scores.groupby(["candidate", "features"], sort=False).agg(
+        r2=("r2", "mean"),
+        r2_std=("r2", "std"),
+        mae_yen=("mae_yen", "mean"),
+        fit_ms=("fit_ms", "mean"),
+        predict_us_per_row=("predict_us_per_row", "mean"),
+    )
+    return board.sort_values(["mae_yen", "r2"], ascending=[True, False]).reset_index()
+
+
+if __name__ == "__main__":
+    # python -m app.services.model_selection [--source URL|DIR] [--ward shinjuku] [--folds 5] [--jobs -1] [--csv out.csv]
+    import argparse
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="候補モデルを k-fold 交差検証で比較してリーダーボードを出す")
+    parser.add_argument("--source", default=settings.DATABASE_URL, help="DB の URL かスナップショットのディレクトリ")
+    parser.add_argument("--ward", help="この区の物件だけで比較する")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="並列数（-1 で全コア）")
+    parser.add_argument("--csv", help="リーダーボードを CSV にも書き出す")
+    args = parser.parse_args()
+
+    X, y = build_dataset(args.source, args.ward)
+    if len(y) < args.folds * 2:
+        raise SystemExit("比較できるデータが足りません。")
+    started = time.perf_counter()
+    board = cross_validate_candidates(X, y, folds=args.folds, n_jobs=args.jobs)
+    with pd.option_context("display.width", 200, "display.max_rows", None, "display.float_format", "{:.4f}".format):
+        print(board.to_string(index=False))
+    print(f"\n{len(y)} 件 × {args.folds} fold を {time.perf_counter() - started:.1f} 秒で比較しました。")
+    if args.csv:
+        board.to_csv(args.csv, index=False)
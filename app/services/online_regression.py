@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class OnlineLinearRegression:
+    """
+    十分統計量だけを持つ線形回帰（重回帰）。全履歴を持たずに、新しいバッチを足して係数を解き直せる。
+
+    持っているのは重み付きの件数・平均・中心化した積和（Σ(x-x̄)(x-x̄)ᵀ, Σ(x-x̄)(y-ȳ), Σ(y-ȳ)²）で、
+    XᵀX / Xᵀy と同じ情報を桁落ちしにくい形で保持している。
+    partial_fit 1回の統計量の更新はバッチ n 行に対して O(n·k²)、既存の統計量とのマージは O(k²)。
+    decay < 1 なら partial_fit のたびに既存の統計量に decay を掛け、古い物件の影響を指数的に減らす。
+    coef_ / intercept_ は solve() で求め、sklearn の LinearRegression と同じように使える。
+    """
+
+    def __init__(self, decay: float = 1.0, ridge: float = 0.0):
+        if not 0.0 < decay <= 1.0:
+            raise ValueError("decay must be in (0, 1]")
+        self.decay = decay
+        self.ridge = ridge
+        self.n_features_in_: int | None = None
+        self.reset()
+
+    def reset(self):
+        self.n_ = 0.0            # 重み付きの件数（decay で減っていく）
+        self.n_seen_ = 0         # これまでに足した行数（減衰しない）
+        self.x_mean_ = None
+        self.y_mean_ = 0.0
+        self.sxx_ = None         # Σ(x-x̄)(x-x̄)ᵀ
+        self.sxy_ = None         # Σ(x-x̄)(y-ȳ)
+        self.syy_ = 0.0          # Σ(y-ȳ)²
+        self.coef_ = None
+        self.intercept_ = None
+        self.r2_ = None
+        return self
+
+    def partial_fit(self, X, y, sample_weight=None, decay: float | None = None):
+        """バッチを統計量に足し込み、係数を解き直す（decay を渡すとこの回だけ self.decay の代わりに使う）"""
+        decay = self.decay if decay is None else decay
+        if not 0.0 < decay <= 1.0:
+            raise ValueError("decay must be in (0, 1]")
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if X.ndim != 2 or len(X) != len(y):
+            raise ValueError("X must be 2-D with one row per y")
+        if self.n_features_in_ is None:
+            k = X.shape[1]
+            self.n_features_in_ = k
+            self.x_mean_ = np.zeros(k)
+            self.sxx_ = np.zeros((k, k))
+            self.sxy_ = np.zeros(k)
+        elif X.shape[1] != self.n_features_in_:
+            raise ValueError(f"expected {self.n_features_in_} features, got {X.shape[1]}")
+
+        # 古い統計量を減衰させる（平均は変わらず、件数と積和だけが縮む）
+        if decay < 1.0 and self.n_ > 0:
+            self.n_ *= decay
+            self.sxx_ *= decay
+            self.sxy_ *= decay
+            self.syy_ *= decay
+
+        if len(y):
+            w = np.ones(len(y)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+            n_b = w.sum()
+            x_mean_b = w @ X / n_b
+            y_mean_b = float(w @ y / n_b)
+            Xc = X - x_mean_b
+            yc = y - y_mean_b
+            Xw = Xc * w[:, None]
+
+            # 2つのグループの統計量を併合する（Chan らの並列アルゴリズムと同じ形）
+            n = self.n_ + n_b
+            dx = x_mean_b - self.x_mean_
+            dy = y_mean_b - self.y_mean_
+            f = self.n_ * n_b / n
+            self.sxx_ += Xw.T @ Xc + f * np.outer(dx, dx)
+            self.sxy_ += Xw.T @ yc + f * dx * dy
+            self.syy_ += float(w @ (yc * yc)) + f * dy * dy
+            self.x_mean_ = self.x_mean_ + dx * (n_b / n)
+            self.y_mean_ = self.y_mean_ + dy * (n_b / n)
+            self.n_ = n
+            self.n_seen_ += len(y)
+
+        return self.solve()
+
+    def solve(self):
+        """統計量から係数を求める（O(k³)、k は特徴量数なので一瞬）"""
+        if self.n_features_in_ is None or self.n_ <= 0:
+            raise ValueError("no data has been added")
+        A = self.sxx_ + self.ridge * np.eye(self.n_features_in_)
+        # 特徴量が定数・共線でも落ちないよう最小二乗で解く
+        self.coef_ = np.linalg.lstsq(A, self.sxy_, rcond=None)[0]
+        self.intercept_ = float(self.y_mean_ - self.x_mean_ @ self.coef_)
+        # 学習データ上の決定係数も統計量だけで求まる（SSE = Syy - 2βᵀSxy + βᵀSxxβ）
+        sse = self.syy_ - 2 * self.coef_ @ self.sxy_ + self.coef_ @ self.sxx_ @ self.coef_
+        self.r2_ = float(1 - sse / self.syy_) if self.syy_ > 0 else None
+        return self
+
+    def fit(self, X, y, sample_weight=None):
+        return self.reset().partial_fit(X, y, sample_weight)
+
+    def predict(self, X):
+        if self.coef_ is None:
+            raise ValueError("model is not fitted")
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+    def score(self, X, y):
+        y = np.asarray(y, dtype=np.float64)
+        residual = y - self.predict(X)
+        total = y - y.mean()
+        return float(1 - residual @ residual / (total @ total))
+
+    @property
+    def y_std_(self) -> float | None:
+        """目的変数（対数家賃）の標準偏差。新しいバッチの外れ値判定に使う"""
+        if self.n_ <= 1:
+            return None
+        return float(np.sqrt(self.syy_ / (self.n_ - 1)))
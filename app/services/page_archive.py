@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud import building as crud_building
+from app.crud import property as crud_property
+from app.schemas.property import PropertyCreate
+from app.services.scraper_v2 import first_room_properties, parse_listing_buildings, parse_listing_page
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+
+
+class PageArchive:
+    """
+    取得した一覧ページの生の HTML を置いておく場所（パースの規則を変えたら、SUUMO に取りに行かずに作り直せる）。
+      {root}/objects/ab/abcdef….html.gz … 本文（gzip）。ファイル名は本文の SHA-256 なので、同じ本文は1つしか持たない
+      {root}/index.jsonl                 … 取得の記録（1行1件、追記のみ）: sha256 / url / ward / page / fetched_at / size
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.html.gz")
+
+    def put(self, html: str, url: str, ward: str | None, page: int, fetched_at: datetime | None = None) -> str:
+        """本文を保存して索引に1行足し、本文の SHA-256 を返す"""
+        data = html.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 書き終えてから置き換えるので、読み手が書きかけの gzip を見ることはない
+            fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+                    gz.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+        entry = {
+            "sha256": sha256,
+            "url": url,
+            "ward": ward,
+            "page": page,
+            "fetched_at": (fetched_at or datetime.now(timezone.utc)).isoformat(),
+            "size": len(data),
+        }
+        with self._lock, open(os.path.join(self.root, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return sha256
+
+    def get(self, sha256: str) -> str:
+        with gzip.open(self._path(sha256), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def entries(self, wards: list[str] | None = None, latest_only: bool = False) -> list[dict]:
+        """索引を取得順に返す。latest_only なら (url, page) ごとに最後に取得したものだけ"""
+        path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.isfile(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        if wards:
+            entries = [e for e in entries if e["ward"] in wards]
+        entries.sort(key=lambda e: e["fetched_at"])
+        if latest_only:
+            latest = {(e["url"], e["page"]): e for e in entries}
+            entries = sorted(latest.values(), key=lambda e: e["fetched_at"])
+        return entries
+
+
+def _parse_entry(root: str, entry: dict, backend: str, grouped: bool = False) -> list:
+    """プロセスプールで1ページを読み直してパースする（grouped なら BuildingCreate のリスト）"""
+    parse = parse_listing_buildings if grouped else parse_listing_page
+    return parse(PageArchive(root).get(entry["sha256"]), entry["page"], entry["ward"], backend)
+
+
+def replay(
+    db: Session,
+    archive: PageArchive,
+    wards: list[str] | None = None,
+    backend: str | None = None,
+    workers: int | None = None,
+    latest_only: bool = False,
+    batch_pages: int = 50,
+) -> dict:
+    """
+    保存済みのページを今のパーサーで読み直して properties に取り込む（通信はしない）。
+    パースはプロセスプールで並列に行い、取り込みは取得順に batch_pages ページずつまとめる
+    （同じ物件が何度も出てくれば、後から取得したページの値が残る）。
+    EXTRACTION_MODE="grouped" なら buildings・units も作り直す。
+    """
+    entries = archive.entries(wards, latest_only)
+    backend = backend or settings.PARSE_BACKEND
+    workers = workers or os.cpu_count() or 1
+    ingest = crud_property.INGEST_MODES[settings.INGEST_MODE]
+    grouped = settings.EXTRACTION_MODE == "grouped"
+    counts = {"pages": 0, "parsed": 0, "inserted": 0, "updated": 0}
+    if not entries:
+        return counts
+
+    def flush(batch, buildings):
+        result = ingest(db, batch)
+        counts["inserted"] += result["inserted"]
+        counts["updated"] += result["updated"]
+        if buildings:
+            crud_building.upsert_buildings_bulk(db, buildings)
+
+    batch: list[PropertyCreate] = []
+    buildings = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        parsed = pool.map(
+            _parse_entry, [archive.root] * len(entries), entries, [backend] * len(entries), [grouped] * len(entries),
+            chunksize=max(1, len(entries) // (workers * 4)),
+        )
+        for page in parsed:
+            properties = first_room_properties(page) if grouped else page
+            counts["pages"] += 1
+            counts["parsed"] += len(properties)
+            batch.extend(properties)
+            if grouped:
+                buildings.extend(page)
+            if counts["pages"] % batch_pages == 0:
+                flush(batch, buildings)
+                batch, buildings = [], []
+    if batch:
+        flush(batch, buildings)
+    if grouped:
+        crud_building.refresh_building_stats(db)
+    logger.info(f"Replayed {counts['pages']} archived pages: {counts}")
+    return counts
+
+
+archive = PageArchive(settings.ARCHIVE_DIR)
+
+
+if __name__ == "__main__":
+    # python -m app.services.page_archive replay [--ward shinjuku ...] [--latest-only] [--backend lxml] [--workers N]
+    import argparse
+    from app.core.db import SessionLocal
+    from app.core.wards import validate_wards
+
+    parser = argparse.ArgumentParser(description="保存済みの一覧ページを読み直して properties を作り直す（通信なし）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("replay", help="保存済みのページを今のパーサーで取り込み直す")
+    run.add_argument("--root", default=settings.ARCHIVE_DIR)
+    run.add_argument("--ward", nargs="+", default=[], help="この区のページだけ")
+    run.add_argument("--latest-only", action="store_true", help="同じページは最後に取得したものだけ読む")
+    run.add_argument("--backend", help="パーサー（既定は PARSE_BACKEND）")
+    run.add_argument("--workers", type=int, help="パースのプロセス数（既定は CPU 数）")
+    stats = sub.add_parser("stats", help="保存済みのページ数と容量")
+    stats.add_argument("--root", default=settings.ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    target = PageArchive(args.root)
+    if args.command == "stats":
+        entries = target.entries()
+        objects = {e["sha256"] for e in entries}
+        stored = sum(os.path.getsize(target._path(sha)) for sha in objects)
+        raw = sum(e["size"] for e in entries)
+        print(f"{len(entries)} 回の取得 / {len(objects)} 種類の本文 / 元 {raw / 1e6:.1f}MB -> 保存 {stored / 1e6:.1f}MB")
+    else:
+        db = SessionLocal()
+        try:
+            print(replay(db, target, validate_wards(args.ward), args.backend, args.workers, args.latest_only))
+        finally:
+            db.close()
@@ -1,40 +1,192 @@
+from typing import Iterator
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Connection, Engine
 from sklearn.model_selection import train_test_split
+from app.core.wards import WARDS
+from app.models.property import Property
+from app.services.snapshot import is_snapshot, iter_snapshot_batches, load_snapshot
 
-def load_and_preprocess_data(db_url: str):
-    """データベースから物件データを読み込み、基本的な前処理を行う"""
-    engine = create_engine(db_url)
-    df = pd.read_sql("SELECT * FROM properties", engine)
-    
-    # 実質家賃の算出
+# API の分析（学習・採点・更新）に必要な列だけ
+ANALYSIS_COLUMNS = ['id', 'price', 'admin_fee', 'liv_area', 'age', 'station_distance', 'floor', 'building_type', 'ward']
+
+# 分割読み込みで使う省メモリの型（float64/int64/object の半分以下）
+COMPACT_DTYPES = {
+    'id': 'int32',
+    'price': 'float32',
+    'admin_fee': 'float32',
+    'liv_area': 'float32',
+    'age': 'Int16',
+    'station_distance': 'Int16',
+    'floor': 'Int16',
+    'building_type': 'category',
+    'floor_plan': 'category',
+    'ward': pd.CategoricalDtype(list(WARDS)),
+}
+
+def _properties_query(columns: list[str] | None = None, where=None):
+    table = Property.__table__
+    query = select(*[table.c[col] for col in columns]) if columns else select(table)
+    return query.where(where) if where is not None else query
+
+def read_properties(source: str | Engine | Connection, columns: list[str] | None = None, where=None) -> pd.DataFrame:
+    """
+    properties を1回だけ読み込む（columns 指定時はその列だけ、where 指定時はその行だけ SELECT する）。
+    source が DB の URL ではなくディレクトリなら、DB の代わりに Parquet のスナップショット（app.services.snapshot）を読む。
+    """
+    if is_snapshot(source):
+        if where is not None:
+            raise ValueError("where is not supported when reading a snapshot")
+        return load_snapshot(source, columns)
+    if isinstance(source, str):
+        source = create_engine(source)
+    return pd.read_sql(_properties_query(columns, where), source)
+
+def iter_property_chunks(
+    source: str | Engine | Connection,
+    columns: list[str] | None = None,
+    chunksize: int = 50_000,
+    where=None,
+) -> Iterator[pd.DataFrame]:
+    """
+    properties を chunksize 行ずつ読む。サーバーサイドカーソル（stream_results）なので、
+    クライアント側に全件を溜めず、メモリに載るのは常に1チャンク分だけ。列は COMPACT_DTYPES の型にする。
+    source がスナップショットのディレクトリなら Parquet を chunksize 行ずつ読む。
+    """
+    columns = columns or ANALYSIS_COLUMNS
+    dtype = {col: COMPACT_DTYPES[col] for col in columns if col in COMPACT_DTYPES}
+    if is_snapshot(source):
+        if where is not None:
+            raise ValueError("where is not supported when reading a snapshot")
+        for chunk in iter_snapshot_batches(source, columns, chunksize):
+            yield chunk.astype(dtype)
+        return
+    if isinstance(source, str):
+        source = create_engine(source)
+    query = _properties_query(columns, where).execution_options(stream_results=True)
+    yield from pd.read_sql(query, source, chunksize=chunksize, dtype=dtype)
+
+class RunningMoments:
+    """Welford 法の平均・分散（バッチごとに Chan らの式で併合する）。全件を持たずに 3σ の基準を作るのに使う"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        n_b = values.size
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+def _log_total_fee(df: pd.DataFrame) -> np.ndarray:
+    """対数家賃（log1p(円)）。家賃が欠損・負の行は NaN になり、_base_mask で落ちる"""
+    total_fee = (df['price'].to_numpy(dtype=np.float64) + df['admin_fee'].to_numpy(dtype=np.float64)) * 10000
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.log1p(total_fee)
+
+def _base_mask(df: pd.DataFrame, log_total_fee: np.ndarray) -> np.ndarray:
+    """3σ 以外の条件（築年数>0・マンション/アパート・必須列あり）"""
+    mask = (df['age'].to_numpy(dtype=np.float64) > 0)
+    mask &= df['building_type'].str.contains('マンション|アパート', na=False).to_numpy(dtype=bool)
+
+    # 分析に必須なカラムの欠損値を除外
+    for col in ['age', 'liv_area', 'station_distance', 'floor']:
+        mask &= np.isfinite(df[col].to_numpy(dtype=np.float64))
+    return mask & np.isfinite(log_total_fee)
+
+def training_mask(df: pd.DataFrame, reference: tuple[float, float] | None = None) -> np.ndarray:
+    """
+    学習に使う行のマスク（築年数>0・マンション/アパート・必須列あり・対数家賃の3σ以内）。
+    DataFrame を絞り込んでコピーを重ねる代わりに、真偽値の配列を1本作るだけにする。
+    reference に (平均, 標準偏差) を渡すと、3σ の基準をこのデータではなくそれにする（少数の追加分を学習するとき用）。
+    """
+    log_total_fee = _log_total_fee(df)
+    mask = _base_mask(df, log_total_fee)
+
+    # 3σ法での外れ値除外
+    log_total_fee = np.where(mask, log_total_fee, 0.0)
+    if reference is not None:
+        mean, std = reference
+        mask &= np.abs(log_total_fee - mean) <= 3 * std
+    elif mask.any():
+        mean = log_total_fee[mask].mean()
+        std = log_total_fee[mask].std(ddof=1) if mask.sum() > 1 else 0.0
+        mask &= np.abs(log_total_fee - mean) <= 3 * std
+    return mask
+
+def iter_preprocessed_chunks(
+    source: str | Engine | Connection,
+    columns: list[str] | None = None,
+    chunksize: int = 50_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    load_and_preprocess_data の分割版。全件を一度にメモリに載せずに、前処理済みのチャンクを順に返す。
+      1パス目: 条件を満たす行の対数家賃の平均・標準偏差を RunningMoments で集計する（行は捨てる）
+      2パス目: 読み直しながら 3σ を含む条件で絞り込み、派生列を足して返す
+    DB を2回読む代わりに、ピークのメモリは行数によらず1チャンク分で一定になる。
+    """
+    columns = list(dict.fromkeys(ANALYSIS_COLUMNS + (columns or [])))
+    moments = RunningMoments()
+    for chunk in iter_property_chunks(source, columns, chunksize):
+        log_total_fee = _log_total_fee(chunk)
+        moments.update(log_total_fee[_base_mask(chunk, log_total_fee)])
+    if moments.count == 0:
+        return
+
+    reference = (moments.mean, moments.std)
+    for chunk in iter_property_chunks(source, columns, chunksize):
+        chunk = chunk[training_mask(chunk, reference)]
+        if chunk.empty:
+            continue
+        chunk = chunk.assign(
+            total_fee=((chunk['price'] + chunk['admin_fee']) * 10000).astype('float32'),
+            log_liv_area=np.log1p(chunk['liv_area']).astype('float32'),
+        )
+        chunk['log_total_fee'] = np.log1p(chunk['total_fee']).astype('float32')
+        yield chunk.reset_index(drop=True)
+
+def load_and_preprocess_data(source: str | Engine | Connection, columns: list[str] | None = None, chunksize: int | None = None):
+    """
+    データベース（またはスナップショットのディレクトリ）から物件データを読み込み、基本的な前処理を行う。
+    chunksize を指定すると iter_preprocessed_chunks で分割して読み、省メモリの型のまま結合して返す。
+    """
+    if chunksize:
+        chunks = list(iter_preprocessed_chunks(source, columns, chunksize))
+        if not chunks:
+            return pd.DataFrame(columns=list(dict.fromkeys(ANALYSIS_COLUMNS + (columns or []))))
+        df = pd.concat(chunks, ignore_index=True)
+        # チャンクごとにカテゴリが違う列は文字列に戻るので、結合後にまとめて category にする
+        for col in ('building_type', 'floor_plan', 'ward'):
+            if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        return df
+
+    df = read_properties(source, columns)
+    df = df[training_mask(df)].copy()
+
+    # 実質家賃の算出と対数変換
     df['total_fee'] = (df['price'] + df['admin_fee'])*10000
-    df = df[df['age'] > 0]
-
-
-    # フィルタリング（部分一致）
-    df = df[df['building_type'].str.contains('マンション|アパート', na=False)].copy()
-    
-    
-    
-    # 分析に必須なカラムの欠損値を削除
-    required_cols = ['age', 'liv_area', 'station_distance', 'floor', 'total_fee']
-    df = df.dropna(subset=required_cols)
-    
-    # 対数変換
     df['log_total_fee'] = np.log1p(df['total_fee'])
     df['log_liv_area'] = np.log1p(df['liv_area'])
 
-    mean = df['log_total_fee'].mean()
-    std = df['log_total_fee'].std()
-
-    df = df[np.abs(df['log_total_fee'] - mean) <= 3 * std].copy()
-    
     return df
 
 def get_train_val_test_split(df: pd.DataFrame):
     """データを学習用(60%)、検証用(20%)、テスト用(20%)に分割する"""
     train_df, temp_df = train_test_split(df, test_size=0.4, random_state=42)
     val_df, test_df = train_test_split(temp_df, test_size=0.5, random_state=42)
-    return train_df, val_df, test_df
\ No newline at end of file
+    return train_df, val_df, test_df
@@ -1,28 +1,35 @@
 import logging
-import re
 import requests
 from bs4 import BeautifulSoup
 from time import sleep
+from app.core.wards import validate_wards
 from app.schemas.property import PropertyCreate
+from app.services.field_parsers import clean_numeric, parse_age, parse_floor, parse_walk_time
 
 logger = logging.getLogger(__name__)
 
 class SuumoScraper:
-    def __init__(self,area_name='shinjuku'):
-        self.base_url = f"https://suumo.jp/chintai/tokyo/sc_{area_name}/"
+    def __init__(self, area_name='shinjuku', wards: list[str] | None = None):
+        # wards で複数の区を指定できる（省略時は area_name の1区）
+        self.wards = validate_wards(wards or [area_name])
+        self.base_url = self.ward_url(self.wards[0])
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
         }
-        logger.info(f"Scraper intitialized for area: {area_name}")
+        logger.info(f"Scraper intitialized for wards: {', '.join(self.wards)}")
+
+    def ward_url(self, ward: str) -> str:
+        return f"https://suumo.jp/chintai/tokyo/sc_{ward}/"
 
     def _extract_text(self, element, selector, default="") -> str:
         found = element.select_one(selector)
         return found.text.strip() if found else default
 
-    def fetch_page(self, page: int = 1) -> list[PropertyCreate]:
+    def fetch_page(self, page: int = 1, ward: str | None = None) -> list[PropertyCreate]:
+        ward = ward or self.wards[0]
         params = {"pn": page} 
         try:
-            res = requests.get(self.base_url, headers=self.headers, params=params, timeout=15)
+            res = requests.get(self.ward_url(ward), headers=self.headers, params=params, timeout=15)
             res.raise_for_status()
             soup = BeautifulSoup(res.text, "html.parser")
         except Exception as e:
@@ -45,10 +52,10 @@ class SuumoScraper:
             for room in rooms:
                 try:
                     # 数値抽出（賃料、面積、管理費、階数）
-                    price_val = self._clean_numeric(self._extract_text(room, ".cassetteitem_other-emphasis"))
-                    admin_fee_val = self._clean_numeric(self._extract_text(room, ".cassetteitem_price--administration")) / 10000  # 円を万円に変換
-                    liv_area_val = self._clean_numeric(self._extract_text(room, ".cassetteitem_menseki"))
-                    floor_val = self._parse_floor(self._extract_text(room, "td:nth-child(3)")) # 3番目のtdが階数
+                    price_val = clean_numeric(self._extract_text(room, ".cassetteitem_other-emphasis"))
+                    admin_fee_val = clean_numeric(self._extract_text(room, ".cassetteitem_price--administration")) / 10000  # 円を万円に変換
+                    liv_area_val = clean_numeric(self._extract_text(room, ".cassetteitem_menseki"))
+                    floor_val = parse_floor(self._extract_text(room, "td:nth-child(3)")) # 3番目のtdが階数
 
                     properties.append(PropertyCreate(
                         title=title,
@@ -56,46 +63,16 @@ class SuumoScraper:
                         price=price_val,
                         admin_fee=admin_fee_val, 
                         liv_area=liv_area_val,
-                        age=self._parse_age(age_str),
-                        station_distance=self._parse_walk_time(walk_text),
+                        age=parse_age(age_str),
+                        station_distance=parse_walk_time(walk_text),
                         floor=floor_val, 
                         floor_plan=self._extract_text(room, ".cassetteitem_madori"),
-                        building_type=b_type
+                        building_type=b_type,
+                        ward=ward,
                     ))
                 except Exception as e:
                     logger.warning(f"Room parse failed in '{title}': {e}")
                     continue
         
-        logger.info(f"Page {page}: {len(properties)} properties extracted.")
+        logger.info(f"{ward} page {page}: {len(properties)} properties extracted.")
         return properties
-
-    def _clean_numeric(self, text: str) -> float:
-        """数値だけを抽出（'15.5万円' -> 15.5, '15000円' -> 15000.0）"""
-        if not text or text == "-" or "別" in text: return 0.0
-        match = re.search(r"(\d+\.?\d*)", text.replace(",", ""))
-        return float(match.group(1)) if match else 0.0
-
-    def _parse_floor(self, text: str) -> int:
-        """'1-2階' -> 1, 'B1階' -> -1, 'B1-2階' -> -1 への変換"""
-        if not text or text == "-": return 1
-        
-        # 範囲指定（1-2階など）の場合、最初の数字を抽出
-        first_part = text.split('-')[0]
-        
-        match = re.search(r"(\d+)", first_part)
-        val = int(match.group(1)) if match else 1
-        
-        # 地下判定
-        if "B" in first_part or "地下" in first_part:
-            return -val
-        return val
-
-    def _parse_walk_time(self, text: str) -> int:
-        match = re.search(r"(\d+)分", text)
-        return int(match.group(1)) if match else 0
-
-    def _parse_age(self, text: str) -> int:
-        if "新築" in text or "0年" in text: return 0
-        match = re.search(r"(\d+)年", text)
-        return int(match.group(1)) if match else 0
-
@@ -1,108 +1,143 @@
+import hashlib
 import logging
-import re
 import requests
-from bs4 import BeautifulSoup
 from time import sleep
+from app.core.config import settings
+from app.core.wards import validate_wards
+from app.schemas.building import BuildingCreate, UnitCreate
 from app.schemas.property import PropertyCreate
+from app.services.field_parsers import clean_numeric, parse_age, parse_floor, parse_walk_time
+from app.services.listing_parser import PARSER_BACKENDS, ROOMS_CLASS, extract_buildings, extract_rows
 
 logger = logging.getLogger(__name__)
 
 class SuumoScraperV2:
-    def __init__(self):
-        # 新宿区の賃貸マンション・アパートに絞ったURL
-        self.base_url = "https://suumo.jp/chintai/tokyo/sc_shinjuku/"
+    def __init__(self, wards: list[str] | None = None, backend: str | None = None):
+        # 対象の区（app.core.wards の識別子）。区ごとに一覧URLが分かれている
+        self.wards = validate_wards(wards or ["shinjuku"])
+        # HTML パーサー（app.services.listing_parser の bs4 / lxml / selectolax）
+        self.backend = backend or settings.PARSE_BACKEND
+        if self.backend not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend: {self.backend}")
+        self.base_url = self.ward_url(self.wards[0])
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
         }
 
-    def _extract_text(self, element, selector, default="") -> str:
-        found = element.select_one(selector)
-        return found.text.strip() if found else default
+    def ward_url(self, ward: str) -> str:
+        """区の賃貸一覧のURL"""
+        return f"https://suumo.jp/chintai/tokyo/sc_{ward}/"
 
-    def fetch_page(self, page: int = 1) -> list[PropertyCreate]:
-        params = {"pn": page} 
+    def page_params(self, page: int) -> dict:
+        """一覧ページのクエリパラメータ（非同期クローラーと共通）"""
+        return {"pn": page}
+
+    def content_hash(self, html: str) -> str:
+        """
+        物件一覧部分だけのハッシュ（広告やトークンなど毎回変わるヘッダー・フッターを無視する）
+        最初の建物の先頭から、最後の建物の部屋の表の閉じタグまで。一覧が見つからない場合はページ全体のハッシュを返す
+        """
+        start = html.find('class="cassetteitem"')
+        # 最後の建物の部屋の表を閉じるところまで含める（最後の部屋の欄が範囲の外に出ないように）
+        last_rooms = html.rfind(f'class="{ROOMS_CLASS}"')
+        end = html.find("</table>", last_rooms) if last_rooms >= 0 else -1
+        body = html[start:end + len("</table>")] if 0 <= start < last_rooms and end >= 0 else html
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def fetch_page(self, page: int = 1, ward: str | None = None) -> list[PropertyCreate]:
+        ward = ward or self.wards[0]
         try:
-            res = requests.get(self.base_url, headers=self.headers, params=params, timeout=15)
+            res = requests.get(self.ward_url(ward), headers=self.headers, params=self.page_params(page), timeout=15)
             res.raise_for_status()
-            soup = BeautifulSoup(res.text, "html.parser")
         except Exception as e:
-            logger.error(f"Page {page} fetch failed: {e}")
+            logger.error(f"{ward} page {page} fetch failed: {e}")
             return []
 
+        return self.parse_page(res.text, page, ward)
+
+    def parse_page(self, html: str, page: int = 1, ward: str | None = None) -> list[PropertyCreate]:
+        """取得済みHTMLから物件リストを抽出する（通信は行わない）。ward を省略すると住所から判定する"""
         properties = []
-        cassettes = soup.select(".cassetteitem")
-        
-        for cassette in cassettes:
-            # --- 建物共通情報の取得 ---
-            title = self._extract_text(cassette, ".cassetteitem_content-title")
-            address = self._extract_text(cassette, ".cassetteitem_detail-col1")
-            age_str = self._extract_text(cassette, ".cassetteitem_detail-col3 div:nth-child(1)")
-            walk_text = self._extract_text(cassette, ".cassetteitem_detail-col2 .cassetteitem_detail-text")
-            b_type = self._extract_text(cassette, ".ui-pct--util1")
-            
-            # --- 【ここが肝】ループを回さず、最初の1部屋(select_one)だけを取得する ---
-            room = cassette.select_one(".cassetteitem_other tbody tr") 
-            
-            if room:
+        # 1つの建物(cassette)につき最初の1部屋だけを読む
+        for row in extract_rows(html, self.backend):
+            try:
+                properties.append(PropertyCreate(
+                    title=row["title"],
+                    address=row["address"],
+                    price=clean_numeric(row["rent"]),
+                    admin_fee=clean_numeric(row["admin_fee"]) / 10000,
+                    liv_area=clean_numeric(row["liv_area"]),
+                    age=parse_age(row["age"]),
+                    station_distance=parse_walk_time(row["walk"]),
+                    floor=parse_floor(row["floor"]),
+                    floor_plan=row["floor_plan"],
+                    building_type=row["building_type"],
+                    ward=ward,
+                ))
+            except Exception as e:
+                logger.warning(f"Room parse failed in '{row['title']}': {e}")
+
+        logger.info(f"Page {page}: {len(properties)} buildings extracted (1 room each).")
+        return properties
+
+    def parse_buildings(self, html: str, page: int = 1, ward: str | None = None) -> list[BuildingCreate]:
+        """取得済みHTMLから建物ごとに全部屋を抽出する（EXTRACTION_MODE="grouped" 用）"""
+        buildings = []
+        for row in extract_buildings(html, self.backend):
+            units = []
+            first_room_parsed = False
+            for i, room in enumerate(row["rooms"]):
                 try:
-                    # 数値抽出（賃料、面積、管理費、階数）
-                    price_val = self._clean_numeric(self._extract_text(room, ".cassetteitem_other-emphasis"))
-                    admin_fee_val = self._clean_numeric(self._extract_text(room, ".cassetteitem_price--administration")) / 10000
-                    liv_area_val = self._clean_numeric(self._extract_text(room, ".cassetteitem_menseki"))
-                    floor_val = self._parse_floor(self._extract_text(room, "td:nth-child(3)"))
-
-                    properties.append(PropertyCreate(
-                        title=title,
-                        address=address,
-                        price=price_val,
-                        admin_fee=admin_fee_val, 
-                        liv_area=liv_area_val,
-                        age=self._parse_age(age_str),
-                        station_distance=self._parse_walk_time(walk_text),
-                        floor=floor_val, 
-                        floor_plan=self._extract_text(room, ".cassetteitem_madori"),
-                        building_type=b_type
+                    units.append(UnitCreate(
+                        price=clean_numeric(room["rent"]),
+                        admin_fee=clean_numeric(room["admin_fee"]) / 10000,
+                        liv_area=clean_numeric(room["liv_area"]),
+                        floor=parse_floor(room["floor"]),
+                        floor_plan=room["floor_plan"],
                     ))
+                    first_room_parsed = first_room_parsed or i == 0
                 except Exception as e:
-                    logger.warning(f"Room parse failed in '{title}': {e}")
-            
-            # 部屋のループがないため、1つの建物(cassette)につき1回しかappendされません。
-        
-        logger.info(f"Page {page}: {len(properties)} buildings extracted (1 room each).")
-        return properties
+                    logger.warning(f"Room parse failed in '{row['title']}': {e}")
+            if not units:
+                continue
+            try:
+                buildings.append(BuildingCreate(
+                    title=row["title"],
+                    address=row["address"],
+                    building_type=row["building_type"],
+                    age=parse_age(row["age"]),
+                    station_distance=parse_walk_time(row["walk"]),
+                    ward=ward,
+                    units=units,
+                    first_room_parsed=first_room_parsed,
+                ))
+            except Exception as e:
+                logger.warning(f"Building parse failed in '{row['title']}': {e}")
 
-    def _clean_numeric(self, text: str) -> float:
-        if not text or text == "-" or "別" in text: return 0.0
-        match = re.search(r"(\d+\.?\d*)", text.replace(",", ""))
-        return float(match.group(1)) if match else 0.0
+        rooms = sum(len(b.units) for b in buildings)
+        logger.info(f"Page {page}: {len(buildings)} buildings / {rooms} rooms extracted.")
+        return buildings
 
-    def _parse_floor(self, text: str) -> int:
-        """階数の文字列を数値に変換する（失敗時は1を返す）"""
-        if not text or text.strip() == "" or text == "-":
-            return 1  # 取れない場合は1階とみなす
-        
-        try:
-            # 範囲指定（1-2階など）の場合、最初の数字を抽出
-            first_part = text.split('-')[0]
-            
-            # 数値だけを抜き出す
-            match = re.search(r"(\d+)", first_part)
-            if match:
-                val = int(match.group(1))
-                # 地下判定
-                if "B" in first_part or "地下" in first_part:
-                    return -val
-                return val
-            return 1
-        except Exception:
-            return 1
-
-
-    def _parse_walk_time(self, text: str) -> int:
-        match = re.search(r"(\d+)分", text)
-        return int(match.group(1)) if match else 0
-
-    def _parse_age(self, text: str) -> int:
-        if "新築" in text or "0年" in text: return 0
-        match = re.search(r"(\d+)年", text)
-        return int(match.group(1)) if match else 0
\ No newline at end of file
+
+def parse_listing_page(html: str, page: int, ward: str | None, backend: str) -> list[PropertyCreate]:
+    """プロセスプールから呼ぶためのモジュール関数（インスタンスやソケットを子プロセスに渡さない）"""
+    return SuumoScraperV2(backend=backend).parse_page(html, page, ward)
+
+
+def parse_listing_buildings(html: str, page: int, ward: str | None, backend: str) -> list[BuildingCreate]:
+    """parse_listing_page の全部屋版"""
+    return SuumoScraperV2(backend=backend).parse_buildings(html, page, ward)
+
+
+def first_room_properties(buildings: list[BuildingCreate]) -> list[PropertyCreate]:
+    """
+    建物ごとに最初の部屋を properties 用の1行にする（first_room モードと同じ行になる）。
+    最初の部屋が読めなかった建物は、first_room モードと同じく行を作らない（2番目の部屋で代わりにしない）
+    """
+    return [
+        PropertyCreate(
+            **b.model_dump(exclude={"units"}),
+            **b.units[0].model_dump(),
+        )
+        for b in buildings if b.first_room_parsed and b.units
+    ]
@@ -0,0 +1,144 @@
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import nullcontext
+from datetime import datetime, timezone
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import Date, DateTime, Float, Integer, cast, create_engine, func, select
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+from app.models.property import Property
+
+logger = logging.getLogger(__name__)
+
+LATEST_FILE = "LATEST"
+
+# パーティション（ディレクトリ名）にする列。crawl_date は created_at の日本時間の日付
+PARTITIONING = ds.partitioning(pa.schema([("ward", pa.string()), ("crawl_date", pa.date32())]), flavor="hive")
+
+
+def _arrow_type(column) -> pa.DataType:
+    if isinstance(column.type, Integer):
+        return pa.int32()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+# properties の全列 ＋ crawl_date
+SCHEMA = pa.schema(
+    [(col.name, _arrow_type(col)) for col in Property.__table__.columns] + [("crawl_date", pa.date32())]
+)
+
+
+def export_snapshot(source: str | Engine | Connection, root: str | None = None, batch_size: int = 50_000) -> str:
+    """
+    properties を Parquet のスナップショットとして書き出し、そのディレクトリを返す。
+      {root}/{version}/ward=shinjuku/crawl_date=2026-01-01/part-0.parquet
+      {root}/LATEST … 最新のスナップショット（load_snapshot が既定で読む）
+    サーバーサイドカーソルで batch_size 行ずつ読んで書くので、全件をメモリに載せない。
+    書き終えてから rename するので、途中のスナップショットは読まれない。
+    """
+    root = root or settings.SNAPSHOT_DIR
+    if isinstance(source, str):
+        source = create_engine(source)
+    os.makedirs(root, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+    table = Property.__table__
+    crawl_date = cast(func.timezone("Asia/Tokyo", table.c.created_at), Date).label("crawl_date")
+    query = select(table, crawl_date).order_by(table.c.id).execution_options(stream_results=True)
+
+    def batches(conn):
+        for rows in conn.execute(query).partitions(batch_size):
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, SCHEMA)], schema=SCHEMA
+            )
+
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=root)
+    try:
+        with source.connect() if isinstance(source, Engine) else nullcontext(source) as conn:
+            ds.write_dataset(
+                batches(conn), tmp, schema=SCHEMA, format="parquet", partitioning=PARTITIONING,
+                existing_data_behavior="overwrite_or_ignore",
+                # 区×日付のディレクトリが増えても開きっぱなしのファイルが溜まらないようにする
+                max_open_files=256,
+            )
+        path = os.path.join(root, version)
+        os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(root, f".{LATEST_FILE}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, LATEST_FILE))
+    logger.info(f"Exported snapshot {path}")
+    return path
+
+
+def is_snapshot(source) -> bool:
+    """DB の URL（"postgresql://..."）ではなく、スナップショットのディレクトリを指しているか"""
+    return isinstance(source, (str, os.PathLike)) and "://" not in str(source)
+
+
+def resolve_snapshot(path: str | os.PathLike | None = None) -> str:
+    """スナップショットの置き場（LATEST があるディレクトリ）なら最新のスナップショットのパスにする"""
+    path = str(path or settings.SNAPSHOT_DIR)
+    pointer = os.path.join(path, LATEST_FILE)
+    if os.path.isfile(pointer):
+        with open(pointer, encoding="utf-8") as f:
+            path = os.path.join(path, f.read().strip())
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No snapshot at {path}")
+    return path
+
+
+def _filters(wards: list[str] | None):
+    return [("ward", "in", wards)] if wards else None
+
+
+def read_snapshot_table(path=None, columns: list[str] | None = None, wards: list[str] | None = None) -> pa.Table:
+    """
+    スナップショットを Arrow の Table として読む。ファイルはメモリマップで開くので、
+    読み込みはページキャッシュからのコピーだけで済む。wards を渡すとその区のディレクトリしか開かない。
+    """
+    return pq.read_table(
+        resolve_snapshot(path), columns=columns, filters=_filters(wards),
+        partitioning=PARTITIONING, memory_map=True,
+    )
+
+
+def load_snapshot(path=None, columns: list[str] | None = None, wards: list[str] | None = None) -> pd.DataFrame:
+    """スナップショットを DataFrame で読む（行はDBから読んだ時と同じく id 順）"""
+    df = read_snapshot_table(path, columns, wards).to_pandas()
+    return df.sort_values("id", ignore_index=True) if "id" in df else df
+
+
+def iter_snapshot_batches(path=None, columns: list[str] | None = None, batch_size: int = 50_000, wards: list[str] | None = None):
+    """スナップショットを batch_size 行ずつの DataFrame で読む（全件をメモリに載せない）"""
+    dataset = ds.dataset(resolve_snapshot(path), format="parquet", partitioning=PARTITIONING)
+    expression = ds.field("ward").isin(wards) if wards else None
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+if __name__ == "__main__":
+    # 定期実行用: python -m app.services.snapshot [--root DIR]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="properties を Parquet のスナップショットに書き出す")
+    parser.add_argument("--root", default=settings.SNAPSHOT_DIR, help="スナップショットの置き場（既定は SNAPSHOT_DIR）")
+    args = parser.parse_args()
+
+    from app.core.db import engine
+    print(f"書き出し: {export_snapshot(engine, args.root)}")
@@ -0,0 +1,202 @@
+import copy
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from app.core.config import settings
+from app.models.property import Property
+from app.services.online_regression import OnlineLinearRegression
+from app.services.preprocess import ANALYSIS_COLUMNS, read_properties, training_mask
+from app.services.inference import FEATURES, build_feature_matrix
+from app.services.model_registry import model_name, registry
+
+logger = logging.getLogger(__name__)
+
+
+def data_fingerprint(X: np.ndarray, y: np.ndarray, previous: str | None = None) -> str:
+    """
+    学習データの指紋（同じデータで学習したかどうかを meta.json から見分ける）。
+    追加学習では前のバージョンの指紋に追加分を連ねる。
+    """
+    h = hashlib.sha256()
+    if previous:
+        h.update(previous.encode())
+    h.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def _touched():
+    table = Property.__table__
+    return func.coalesce(table.c.updated_at, table.c.created_at)
+
+
+def _watermark(db: Session, grace: float = 0.0) -> datetime:
+    """
+    今回の学習で読む行の上端（次の追加学習はこれより後に作成・更新された行を読む）。
+    全件学習は読み始めた時刻（now()）で切り、その時点で commit 済みの行をすべて読む。
+    created_at / updated_at は書き込み側のトランザクション開始時刻（now()）で、commit の順とは限らないので、
+    追加学習では grace 秒（MODEL_WATERMARK_GRACE_SECONDS）戻した時刻で切る。読んだ行の最大値を上端にすると、
+    それより前の時刻で書きかけだったバッチが後から commit されたときに上端以下の日時で現れて二度と読まれない。
+    """
+    return db.execute(select(func.now() - timedelta(seconds=grace))).scalar_one()
+
+
+def fit_rent_model(X: np.ndarray, y: np.ndarray) -> tuple[OnlineLinearRegression, dict]:
+    """
+    80/20 のホールドアウトで精度を測ってから、全件で学習し直したモデルを返す。
+    y は対数家賃（log1p(円)）。モデルは十分統計量を持つので、後から update_and_register で追加学習できる。
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    holdout = OnlineLinearRegression().fit(X_train, y_train)
+    log_pred = holdout.predict(X_test)
+
+    model = OnlineLinearRegression(decay=settings.MODEL_DECAY).fit(X, y)
+    metrics = {
+        "r2_train": float(model.score(X, y)),
+        "r2_holdout": float(r2_score(y_test, log_pred)),
+        "mae_holdout_yen": float(mean_absolute_error(np.expm1(y_test), np.expm1(log_pred))),
+        "train_rows": int(len(y)),
+    }
+    return model, metrics
+
+
+def train_and_register(db: Session, name: str | None = None, activate: bool = True, ward: str | None = None) -> dict | None:
+    """
+    DBの物件で家賃モデルを学習してレジストリに登録する（データ不足なら None）。
+    ward を指定するとその区の物件だけで学習し、区専用のモデル（model_name(ward)）として登録する。
+    API の採点はここで登録・有効化されたモデルを使うだけで、リクエスト中には学習しない。
+    """
+    name = name or model_name(ward)
+    # 行の物理的な並びは UPDATE で変わるので、id 順にそろえて分割と指紋を再現可能にする
+    # 直前のクロールで入った行も読む（猶予を取ると、初回のクロール直後の /analyze で学習できる行がなくなる）
+    data_through = _watermark(db)
+    df = read_properties(db.connection(), ANALYSIS_COLUMNS, where=_touched() <= data_through).sort_values('id', ignore_index=True)
+    if ward:
+        df = df[df['ward'] == ward].reset_index(drop=True)
+    if df.empty:
+        return None
+
+    X, valid = build_feature_matrix(df['age'], df['liv_area'], df['station_distance'], df['floor'])
+    train = training_mask(df) & valid
+    # ホールドアウトにも最低限の行数が必要
+    if train.sum() < 5 * (len(FEATURES) + 1):
+        logger.warning(f"Not enough clean rows to train {name}.")
+        return None
+
+    X = X[train]
+    y = np.log1p((df['price'].to_numpy(dtype=np.float64)[train] + df['admin_fee'].to_numpy(dtype=np.float64)[train]) * 10000)
+    model, metrics = fit_rent_model(X, y)
+
+    meta = {
+        "features": FEATURES,
+        "target": "log1p(monthly_fee_yen)",
+        "estimator": type(model).__name__,
+        "metrics": metrics,
+        "ward": ward,
+        "data_fingerprint": data_fingerprint(X, y),
+        "data_through": data_through.isoformat(),
+        "base_version": None,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    }
+    version = registry.save(name, model, meta)
+    if activate:
+        registry.activate(name, version)
+    logger.info(f"Trained {name}/{version}: R^2 holdout {metrics['r2_holdout']:.4f} on {metrics['train_rows']} rows")
+    return {**meta, "name": name, "version": version}
+
+
+def update_and_register(
+    db: Session,
+    name: str | None = None,
+    activate: bool = True,
+    ward: str | None = None,
+    decay: float | None = None,
+) -> dict | None:
+    """
+    有効なモデルに、前回の学習以降に作成・更新された物件だけを追加学習させて新しいバージョンとして登録する。
+    読むのは追加分だけで、統計量の更新は O(k²) なので、履歴がいくら増えても1回のコストは変わらない。
+    decay（既定は settings.MODEL_DECAY）< 1 なら既存の統計量を薄めてから足すので、古い相場の影響が徐々に消える。
+    更新された物件は前の値も統計量に残る（decay で薄まる）。
+    追加学習できるモデルがまだない場合は train_and_register で全件から作る。追加分がなければ None。
+    """
+    name = name or model_name(ward)
+    active = registry.get_active(name)
+    if active is None or not isinstance(active.model, OnlineLinearRegression) or not active.meta.get("data_through"):
+        logger.info(f"{name} has no incrementally trainable version; training from all rows.")
+        return train_and_register(db, name=name, activate=activate, ward=ward)
+
+    # (前回の上端, 今回の上端] だけを読む。全件学習の直後は今回の上端が前回より前になり、追加分なしになる
+    data_through = _watermark(db, settings.MODEL_WATERMARK_GRACE_SECONDS)
+    touched = _touched()
+    where = (touched > datetime.fromisoformat(active.meta["data_through"])) & (touched <= data_through)
+    if ward:
+        where &= Property.__table__.c.ward == ward
+    df = read_properties(db.connection(), ANALYSIS_COLUMNS, where=where).sort_values('id', ignore_index=True)
+    if df.empty:
+        return None
+
+    # 追加分は少ないことが多いので、外れ値の基準はそのバッチではなくモデルが覚えている分布にする
+    model = copy.deepcopy(active.model)
+    X, valid = build_feature_matrix(df['age'], df['liv_area'], df['station_distance'], df['floor'])
+    reference = (model.y_mean_, model.y_std_) if model.y_std_ is not None else None
+    train = training_mask(df, reference=reference) & valid
+    X = X[train]
+    y = np.log1p((df['price'].to_numpy(dtype=np.float64)[train] + df['admin_fee'].to_numpy(dtype=np.float64)[train]) * 10000)
+
+    metrics = {"batch_rows": int(len(y))}
+    if len(y) > 1:
+        # 学習前のモデルで追加分を当ててから学習する（追加分がそのままホールドアウトになる）
+        log_pred = model.predict(X)
+        metrics["r2_holdout"] = float(r2_score(y, log_pred))
+        metrics["mae_holdout_yen"] = float(mean_absolute_error(np.expm1(y), np.expm1(log_pred)))
+    if len(y):
+        model.partial_fit(X, y, decay=settings.MODEL_DECAY if decay is None else decay)
+    metrics.update(r2_train=model.r2_, train_rows=int(model.n_seen_), effective_rows=float(model.n_))
+
+    meta = {
+        **{k: active.meta[k] for k in ("features", "target", "ward")},
+        "estimator": type(model).__name__,
+        "metrics": metrics,
+        "data_fingerprint": data_fingerprint(X, y, previous=active.meta["data_fingerprint"]),
+        "data_through": data_through.isoformat(),
+        "base_version": active.version,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    }
+    version = registry.save(name, model, meta)
+    if activate:
+        registry.activate(name, version)
+    logger.info(f"Updated {name}/{active.version} -> {version} with {len(y)} rows ({model.n_seen_} in total)")
+    return {**meta, "name": name, "version": version}
+
+
+if __name__ == "__main__":
+    # 定期実行用: python -m app.services.training [--ward shinjuku ...] [--all-wards] [--no-activate] [--incremental]
+    import argparse
+    from app.core.db import SessionLocal
+    from app.core.wards import WARDS, validate_wards
+
+    parser = argparse.ArgumentParser(description="家賃モデルを学習してレジストリに登録する")
+    parser.add_argument("--ward", nargs="+", default=[], help="区専用のモデルも学習する（shinjuku など）")
+    parser.add_argument("--all-wards", action="store_true", help="23区すべての区専用モデルを学習する（データ不足の区は飛ばす）")
+    parser.add_argument("--no-activate", action="store_true", help="登録だけして ACTIVE は切り替えない")
+    parser.add_argument("--incremental", action="store_true", help="有効なモデルに前回以降の追加分だけを学習させる")
+    args = parser.parse_args()
+
+    # 全区共通モデル（区専用モデルがない区の採点に使う）は毎回作る
+    targets = [None] + (list(WARDS) if args.all_wards else validate_wards(args.ward))
+    db = SessionLocal()
+    try:
+        for ward in targets:
+            train = update_and_register if args.incremental else train_and_register
+            meta = train(db, ward=ward, activate=not args.no_activate)
+            if meta is None:
+                print(f"{model_name(ward)}: 学習できる{'追加' if args.incremental else ''}データがありません。")
+            else:
+                print(f"登録: {meta['name']}/{meta['version']}  R^2(holdout)={meta['metrics'].get('r2_holdout')}")
+    finally:
+        db.close()